@@ -0,0 +1,114 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque
+
+from .metrics import registry
+
+ADMISSION_LIMIT = registry.gauge("admission_concurrency_limit", "Current adaptive concurrency limit")
+ADMISSION_INFLIGHT = registry.gauge("admission_inflight", "Requests currently admitted")
+ADMISSION_QUEUE = registry.gauge("admission_queue_depth", "Requests waiting for admission")
+ADMISSION_REJECTED = registry.counter("admission_rejected_total", "Requests shed by admission control")
+
+
+class Overloaded(Exception):
+	pass
+
+
+class AdaptiveLimiter:
+	"""AIMD concurrency limit driven by observed request latency.
+
+	Every completed request is a sample. One slower than `target_s` shrinks
+	the limit multiplicatively, at most once per `target_s` so one slow
+	burst is not punished repeatedly. A fast one grows it by `1/limit`, so
+	about +1 per limit's worth of requests, but only while the limit is
+	actually being used. Requests over the limit wait in a short FIFO queue
+	and are rejected once it is full or their wait times out.
+
+	Runs on the event loop only, so no locking is needed.
+	"""
+
+	def __init__(
+		self,
+		initial: int,
+		min_limit: int,
+		max_limit: int,
+		target_s: float,
+		backoff: float,
+		queue_size: int,
+		queue_timeout_s: float,
+	) -> None:
+		self.limit = float(initial)
+		self.min_limit = min_limit
+		self.max_limit = max_limit
+		self.target_s = target_s
+		self.backoff = backoff
+		self.queue_size = queue_size
+		self.queue_timeout_s = queue_timeout_s
+		self.inflight = 0
+		self._waiters: Deque[asyncio.Future] = deque()
+		self._last_decrease = 0.0
+		ADMISSION_LIMIT.set(self.limit)
+
+	def _publish(self) -> None:
+		ADMISSION_INFLIGHT.set(self.inflight)
+		ADMISSION_QUEUE.set(len(self._waiters))
+
+	async def acquire(self) -> None:
+		if self.inflight < int(self.limit) and not self._waiters:
+			self.inflight += 1
+			self._publish()
+			return
+		if len(self._waiters) >= self.queue_size:
+			ADMISSION_REJECTED.inc(reason="queue_full")
+			raise Overloaded()
+
+		waiter = asyncio.get_running_loop().create_future()
+		self._waiters.append(waiter)
+		self._publish()
+		try:
+			# release() hands its slot straight to the waiter, so inflight is already counted
+			await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_s)
+		except asyncio.TimeoutError:
+			if waiter.done():
+				# Admitted just as the timeout fired: keep the slot
+				return
+			waiter.cancel()
+			ADMISSION_REJECTED.inc(reason="queue_timeout")
+			raise Overloaded()
+		except asyncio.CancelledError:
+			# Client went away; a slot already handed to us must not leak
+			if waiter.done() and not waiter.cancelled():
+				self._free_slot()
+			else:
+				waiter.cancel()
+			raise
+		finally:
+			if waiter in self._waiters:
+				self._waiters.remove(waiter)
+			self._publish()
+
+	def release(self, latency_s: float) -> None:
+		self._adjust(latency_s)
+		self._free_slot()
+
+	def _free_slot(self) -> None:
+		# Hand the slot to the oldest live waiter, or give it up
+		while self._waiters and self.inflight <= int(self.limit):
+			waiter = self._waiters.popleft()
+			if not waiter.done():
+				waiter.set_result(None)
+				self._publish()
+				return
+		self.inflight -= 1
+		self._publish()
+
+	def _adjust(self, latency_s: float) -> None:
+		now = time.monotonic()
+		if latency_s > self.target_s:
+			if now - self._last_decrease >= self.target_s:
+				self.limit = max(float(self.min_limit), self.limit * self.backoff)
+				self._last_decrease = now
+		elif self.inflight >= self.limit / 2:
+			self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+		ADMISSION_LIMIT.set(self.limit)
@@ -0,0 +1,207 @@
+import json
+import os
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+# Year stored for movies without one; never matches a year filter
+NO_YEAR = np.iinfo(np.int32).min
+
+_ARRAYS = ("centroids", "offsets", "rows", "vectors", "years", "genre_bits")
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+	centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+	sq_norms = np.einsum("ij,ij->i", vectors, vectors)
+	for _ in range(iterations):
+		assign = _nearest(vectors, sq_norms, centroids)
+		counts = np.bincount(assign, minlength=n_lists)
+		sums = np.zeros_like(centroids)
+		np.add.at(sums, assign, vectors)
+		filled = counts > 0
+		centroids[filled] = sums[filled] / counts[filled, None]
+		# Re-seed empty lists from random points so every list stays useful
+		empty = np.flatnonzero(~filled)
+		if empty.size:
+			centroids[empty] = vectors[rng.choice(len(vectors), empty.size, replace=False)]
+	return centroids
+
+
+def _nearest(vectors: np.ndarray, sq_norms: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+	# argmin ||v - c||^2 = argmin (||c||^2 - 2 v.c); computed in chunks to bound memory
+	c_norms = np.einsum("ij,ij->i", centroids, centroids)
+	out = np.empty(len(vectors), dtype=np.int64)
+	for start in range(0, len(vectors), chunk):
+		block = vectors[start:start + chunk]
+		out[start:start + chunk] = np.argmin(c_norms[None, :] - 2.0 * block @ centroids.T, axis=1)
+	return out
+
+
+def _genre_mask(genre_bits: np.ndarray, genre_id: int) -> np.ndarray:
+	byte, bit = divmod(genre_id, 8)
+	if byte >= genre_bits.shape[1]:
+		return np.zeros(len(genre_bits), dtype=bool)
+	return (genre_bits[:, byte] & np.uint8(1 << bit)) != 0
+
+
+def _filter_mask(
+	years: np.ndarray,
+	genre_bits: np.ndarray,
+	genre_id: Optional[int],
+	year_min: Optional[int],
+	year_max: Optional[int],
+) -> Optional[np.ndarray]:
+	mask = None
+	if genre_id is not None:
+		mask = _genre_mask(genre_bits, genre_id)
+	if year_min is not None:
+		m = years >= year_min
+		mask = m if mask is None else mask & m
+	if year_max is not None:
+		m = (years <= year_max) & (years != NO_YEAR)
+		mask = m if mask is None else mask & m
+	return mask
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+	k = min(k, scores.size)
+	if k == 0:
+		return np.empty(0, dtype=np.int64)
+	top = np.argpartition(-scores, k - 1)[:k]
+	return top[np.argsort(-scores[top])]
+
+
+def encode_genres(genre_lists: Sequence[Sequence[int]], max_genre_id: int) -> np.ndarray:
+	"""Pack per-item genre ids into a (n_items, ceil((max_id + 1) / 8)) bitset."""
+	bits = np.zeros((len(genre_lists), max_genre_id // 8 + 1), dtype=np.uint8)
+	for row, genres in enumerate(genre_lists):
+		for genre_id in genres:
+			bits[row, genre_id // 8] |= np.uint8(1 << (genre_id % 8))
+	return bits
+
+
+class IVFIndex:
+	"""Inverted-file index for maximum inner product search with metadata filters.
+
+	Items are clustered with k-means and stored contiguously per list, so a
+	query scores only the lists whose centroids best match it. `rows` maps
+	each stored position back to the caller's item row. Year and genre
+	filters are applied to the probed block before scoring, and probing
+	widens automatically when a selective filter leaves fewer than k hits.
+	"""
+
+	def __init__(self, centroids, offsets, rows, vectors, years, genre_bits) -> None:
+		self.centroids = centroids
+		self.offsets = offsets
+		self.rows = rows
+		self.vectors = vectors
+		self.years = years
+		self.genre_bits = genre_bits
+
+	@classmethod
+	def build(
+		cls,
+		vectors: np.ndarray,
+		years: np.ndarray,
+		genre_bits: np.ndarray,
+		n_lists: int,
+		iterations: int = 15,
+		seed: int = 0,
+	) -> "IVFIndex":
+		vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+		n_lists = max(1, min(n_lists, len(vectors)))
+		rng = np.random.default_rng(seed)
+		# Train on a sample; assignment below still covers every item
+		sample = vectors[rng.choice(len(vectors), min(len(vectors), n_lists * 256), replace=False)]
+		centroids = _kmeans(sample, n_lists, iterations, rng)
+		assign = _nearest(vectors, np.einsum("ij,ij->i", vectors, vectors), centroids)
+		order = np.argsort(assign, kind="stable")
+		offsets = np.zeros(n_lists + 1, dtype=np.int64)
+		np.cumsum(np.bincount(assign, minlength=n_lists), out=offsets[1:])
+		return cls(
+			centroids.astype(np.float32),
+			offsets,
+			order.astype(np.int64),
+			vectors[order],
+			np.asarray(years, dtype=np.int32)[order],
+			np.asarray(genre_bits, dtype=np.uint8)[order],
+		)
+
+	def save(self, path: Path) -> None:
+		# Every file is written aside and renamed into place, so a reader that has the
+		# previous arrays memory-mapped keeps its own (old) inodes; meta.json goes last
+		path.mkdir(parents=True, exist_ok=True)
+		for name in _ARRAYS:
+			tmp = path / f"{name}.npy.tmp"
+			with open(tmp, "wb") as fh:
+				np.save(fh, getattr(self, name))
+			os.replace(tmp, path / f"{name}.npy")
+		tmp = path / "meta.json.tmp"
+		tmp.write_text(
+			json.dumps({"n_lists": len(self.centroids), "n_items": len(self.rows), "dim": self.vectors.shape[1]}),
+			encoding="utf-8",
+		)
+		os.replace(tmp, path / "meta.json")
+
+	@classmethod
+	def load(cls, path: Path, mmap: bool = True) -> "IVFIndex":
+		mode = "r" if mmap else None
+		return cls(*(np.load(path / f"{name}.npy", mmap_mode=mode) for name in _ARRAYS))
+
+	def search(
+		self,
+		query: np.ndarray,
+		k: int,
+		nprobe: int = 8,
+		genre_id: Optional[int] = None,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+		exclude_rows: Optional[np.ndarray] = None,
+	) -> Tuple[np.ndarray, np.ndarray]:
+		"""Approximate top-k item rows and their scores, best first."""
+		query = np.asarray(query, dtype=np.float32)
+		list_order = np.argsort(-(self.centroids @ query))
+		found_pos, found_scores = [], []
+		hits = 0
+		for start in range(0, len(list_order), nprobe):
+			for lst in list_order[start:start + nprobe]:
+				lo, hi = int(self.offsets[lst]), int(self.offsets[lst + 1])
+				if lo == hi:
+					continue
+				pos = np.arange(lo, hi)
+				mask = _filter_mask(self.years[lo:hi], self.genre_bits[lo:hi], genre_id, year_min, year_max)
+				if exclude_rows is not None and exclude_rows.size:
+					keep = ~np.isin(self.rows[lo:hi], exclude_rows)
+					mask = keep if mask is None else mask & keep
+				if mask is not None:
+					pos = pos[mask]
+					if pos.size == 0:
+						continue
+				found_pos.append(pos)
+				found_scores.append(self.vectors[pos] @ query)
+				hits += pos.size
+			if hits >= k:
+				break
+
+		if not found_pos:
+			return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+		pos = np.concatenate(found_pos)
+		scores = np.concatenate(found_scores)
+		top = _top_k(scores, k)
+		return self.rows[pos[top]], scores[top]
+
+	def exact_search(
+		self,
+		query: np.ndarray,
+		k: int,
+		genre_id: Optional[int] = None,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+	) -> Tuple[np.ndarray, np.ndarray]:
+		"""Brute-force reference with the same filters, for recall measurements."""
+		scores = self.vectors @ np.asarray(query, dtype=np.float32)
+		mask = _filter_mask(self.years, self.genre_bits, genre_id, year_min, year_max)
+		pos = np.arange(len(scores)) if mask is None else np.flatnonzero(mask)
+		top = _top_k(scores[pos], k)
+		return self.rows[pos[top]], scores[pos[top]]
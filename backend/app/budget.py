@@ -0,0 +1,62 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+from .metrics import registry
+
+BUDGET_EXCEEDED = registry.counter("db_budget_exceeded_total", "DB work cut off by the per-request time budget")
+
+# SQLite VM instructions between deadline checks
+PROGRESS_INTERVAL = 1000
+
+_deadline: ContextVar[Optional[float]] = ContextVar("db_deadline", default=None)
+
+
+class BudgetExceeded(Exception):
+	pass
+
+
+@contextmanager
+def time_budget(budget_ms: float = settings.DB_TIME_BUDGET_MS) -> Iterator[None]:
+	"""Bound the DB work done inside the block to `budget_ms` (0 = unbounded).
+
+	Raises BudgetExceeded when the deadline passes between statements or, on
+	SQLite, in the middle of one.
+	"""
+	if budget_ms <= 0:
+		yield
+		return
+	token = _deadline.set(time.monotonic() + budget_ms / 1000.0)
+	try:
+		yield
+	except Exception as exc:
+		if _expired():
+			BUDGET_EXCEEDED.inc()
+			raise BudgetExceeded() from exc
+		raise
+	finally:
+		_deadline.reset(token)
+
+
+def _expired() -> bool:
+	deadline = _deadline.get()
+	return deadline is not None and time.monotonic() >= deadline
+
+
+def install(engine: Engine) -> None:
+	@event.listens_for(engine, "before_cursor_execute")
+	def _check_deadline(conn, cursor, statement, parameters, context, executemany):
+		if _expired():
+			raise TimeoutError("DB time budget exhausted")
+
+	if engine.dialect.name == "sqlite":
+
+		@event.listens_for(engine, "connect")
+		def _interrupt_on_deadline(dbapi_conn, _record):
+			# A non-zero return aborts the running statement with "interrupted"
+			dbapi_conn.set_progress_handler(_expired, PROGRESS_INTERVAL)
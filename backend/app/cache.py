@@ -0,0 +1,277 @@
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+import orjson
+
+from .config import settings
+from .memprofile import track
+from .metrics import record_cache
+
+# Used by the sqlite backend when CACHE_URL is empty
+_DEFAULT_SQLITE_PATH = Path(__file__).resolve().parents[1] / "data" / "cache.db"
+
+
+def _json_default(obj: Any) -> Any:
+	# NamedTuples (e.g. MovieRecord) are stored as plain JSON arrays
+	if isinstance(obj, tuple):
+		return list(obj)
+	raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(value: Any) -> bytes:
+	return orjson.dumps(value, default=_json_default)
+
+
+class CacheBackend(ABC):
+	"""Minimal key/value interface shared by every backend.
+
+	Values are JSON-shaped Python objects; backends that leave the process
+	encode them with orjson.
+	"""
+
+	# True when values come back as fresh JSON-decoded objects rather than by reference
+	serializes = False
+
+	@abstractmethod
+	def get(self, key: str) -> Any:
+		...
+
+	@abstractmethod
+	def set(self, key: str, value: Any, ttl_s: Optional[float]) -> None:
+		...
+
+	@abstractmethod
+	def incr(self, key: str) -> int:
+		...
+
+	@abstractmethod
+	def read_counter(self, key: str) -> int:
+		...
+
+
+class NullBackend(CacheBackend):
+	def get(self, key: str) -> Any:
+		return None
+
+	def set(self, key: str, value: Any, ttl_s: Optional[float]) -> None:
+		pass
+
+	def incr(self, key: str) -> int:
+		return 0
+
+	def read_counter(self, key: str) -> int:
+		return 0
+
+
+class MemoryBackend(CacheBackend):
+	"""In-process LRU with per-entry TTL. Values are stored by reference."""
+
+	def __init__(self, max_entries: int = 1024) -> None:
+		self.max_entries = max_entries
+		self._data: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+		self._counters: dict = {}
+		self._lock = threading.Lock()
+
+	def get(self, key: str) -> Any:
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is None:
+				return None
+			expires_at, value = entry
+			if expires_at is not None and expires_at <= time.monotonic():
+				del self._data[key]
+				return None
+			self._data.move_to_end(key)
+			return value
+
+	def set(self, key: str, value: Any, ttl_s: Optional[float]) -> None:
+		expires_at = time.monotonic() + ttl_s if ttl_s else None
+		with self._lock:
+			self._data[key] = (expires_at, value)
+			self._data.move_to_end(key)
+			while len(self._data) > self.max_entries:
+				self._data.popitem(last=False)
+
+	def incr(self, key: str) -> int:
+		with self._lock:
+			self._counters[key] = self._counters.get(key, 0) + 1
+			return self._counters[key]
+
+	def read_counter(self, key: str) -> int:
+		return self._counters.get(key, 0)
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+
+class SQLiteBackend(CacheBackend):
+	"""Cache stored in a local SQLite file, shared by all workers on one host."""
+
+	serializes = True
+
+	def __init__(self, path: str, max_entries: int = 10000) -> None:
+		self.path = path
+		self.max_entries = max_entries
+		self._local = threading.local()
+		self._writes = 0
+		Path(path).parent.mkdir(parents=True, exist_ok=True)
+		conn = self._conn()
+		conn.execute(
+			"CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+		)
+		conn.execute("CREATE TABLE IF NOT EXISTS cache_counter (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+	def _conn(self) -> sqlite3.Connection:
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			self._local.conn = conn
+		return conn
+
+	def get(self, key: str) -> Any:
+		row = self._conn().execute(
+			"SELECT value, expires_at FROM cache_entry WHERE key = ?", (key,)
+		).fetchone()
+		if row is None or (row[1] is not None and row[1] <= time.time()):
+			return None
+		return orjson.loads(row[0])
+
+	def set(self, key: str, value: Any, ttl_s: Optional[float]) -> None:
+		expires_at = time.time() + ttl_s if ttl_s else None
+		conn = self._conn()
+		conn.execute(
+			"INSERT OR REPLACE INTO cache_entry (key, value, expires_at) VALUES (?, ?, ?)",
+			(key, _dumps(value), expires_at),
+		)
+		self._writes += 1
+		if self._writes % 100 == 0:
+			self._evict(conn)
+
+	def _evict(self, conn: sqlite3.Connection) -> None:
+		conn.execute("DELETE FROM cache_entry WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+		conn.execute(
+			"DELETE FROM cache_entry WHERE rowid IN ("
+			"SELECT rowid FROM cache_entry ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+			(self.max_entries,),
+		)
+
+	def incr(self, key: str) -> int:
+		row = self._conn().execute(
+			"INSERT INTO cache_counter (key, value) VALUES (?, 1) "
+			"ON CONFLICT(key) DO UPDATE SET value = value + 1 RETURNING value",
+			(key,),
+		).fetchone()
+		return row[0]
+
+	def read_counter(self, key: str) -> int:
+		row = self._conn().execute("SELECT value FROM cache_counter WHERE key = ?", (key,)).fetchone()
+		return row[0] if row else 0
+
+
+class RedisBackend(CacheBackend):
+	"""Backend for any client speaking the redis-py API (get/set/incr).
+
+	Pass `client` to use a fake in tests; otherwise the optional `redis`
+	package is imported and connected to `url`.
+	"""
+
+	serializes = True
+
+	def __init__(self, url: str = "", client: Any = None) -> None:
+		if client is None:
+			try:
+				import redis
+			except ImportError as exc:
+				raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+			client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+		self.client = client
+
+	def get(self, key: str) -> Any:
+		raw = self.client.get(key)
+		return None if raw is None else orjson.loads(raw)
+
+	def set(self, key: str, value: Any, ttl_s: Optional[float]) -> None:
+		self.client.set(key, _dumps(value), px=int(ttl_s * 1000) if ttl_s else None)
+
+	def incr(self, key: str) -> int:
+		return int(self.client.incr(key))
+
+	def read_counter(self, key: str) -> int:
+		raw = self.client.get(key)
+		return int(raw) if raw is not None else 0
+
+
+class Cache:
+	"""Namespaced, versioned view over a backend.
+
+	Every key embeds the backend's version counter and the catalog version
+	this worker serves, so `bump_version()` or a new catalog version
+	invalidates all entries at once without scanning or deleting them;
+	stale entries simply age out of the backend.
+	"""
+
+	VERSION_KEY = "catalog_version"
+
+	def __init__(self, backend: CacheBackend, ttl_s: Optional[float] = None, namespace: str = "movies") -> None:
+		self.backend = backend
+		self.ttl_s = ttl_s
+		self.namespace = namespace
+		# Set by the catalog watcher when the DB catalog version changes
+		self.catalog_version = 0
+
+	def version(self) -> int:
+		return self.backend.read_counter(f"{self.namespace}:{self.VERSION_KEY}")
+
+	def bump_version(self) -> int:
+		return self.backend.incr(f"{self.namespace}:{self.VERSION_KEY}")
+
+	def _key(self, name: str, key: str) -> str:
+		return f"{self.namespace}:v{self.version()}.{self.catalog_version}:{name}:{key}"
+
+	def get_or_set(
+		self,
+		name: str,
+		key: str,
+		compute: Callable[[], Any],
+		decode: Optional[Callable[[Any], Any]] = None,
+	) -> Any:
+		"""Cached value, or `compute()` stored on a miss.
+
+		`decode` rebuilds rich objects (e.g. NamedTuples, which JSON turns into
+		arrays) from values returned by serializing backends.
+		"""
+		full_key = self._key(name, key)
+		value = self.backend.get(full_key)
+		record_cache(name, value is not None)
+		if value is None:
+			value = compute()
+			self.backend.set(full_key, value, self.ttl_s)
+		elif decode is not None and self.backend.serializes:
+			value = decode(value)
+		return value
+
+
+def make_backend(kind: str, url: str = "", max_entries: int = 1024) -> CacheBackend:
+	if kind == "memory":
+		return MemoryBackend(max_entries)
+	if kind == "sqlite":
+		return SQLiteBackend(url or str(_DEFAULT_SQLITE_PATH), max_entries)
+	if kind == "redis":
+		return RedisBackend(url)
+	if kind == "none":
+		return NullBackend()
+	raise ValueError(f"Unknown CACHE_BACKEND: {kind}")
+
+
+cache = Cache(
+	make_backend(settings.CACHE_BACKEND, settings.CACHE_URL, settings.CACHE_MAX_ENTRIES),
+	ttl_s=settings.CACHE_TTL_S,
+)
+track("cache", lambda: cache.backend)
@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from .cache import cache
+from .config import settings
+from .db import catalog_session, snapshots
+from .metrics import registry
+from .models import CatalogVersion, Genre
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CATALOG_VERSION = registry.gauge("catalog_version", "Catalog version currently served by this worker")
+INDEX_BUILD_SECONDS = registry.gauge("catalog_index_build_seconds", "Duration of the last rebuild per index")
+
+
+def get_catalog_version(session: Session) -> int:
+	row = session.get(CatalogVersion, 1)
+	return row.version if row else 0
+
+
+def bump_catalog_version(session: Session) -> int:
+	row = session.get(CatalogVersion, 1)
+	if row is None:
+		row = CatalogVersion(id=1, version=0)
+	row.version += 1
+	row.updated_at = time.time()
+	session.add(row)
+	session.commit()
+	return row.version
+
+
+class DerivedIndex(Generic[T]):
+	"""An in-memory structure derived from the catalog tables.
+
+	Rebuilds construct a complete new value and then replace the reference,
+	so readers always see either the old or the new index, never a partial
+	one, and never wait on a rebuild once the first build has finished.
+	"""
+
+	def __init__(self, name: str, builder: Callable[[Session], T]) -> None:
+		self.name = name
+		self.builder = builder
+		self._value: Optional[T] = None
+		self._build_lock = threading.RLock()
+
+	def build(self, session: Session) -> T:
+		"""Compute a new value from `session` without publishing it."""
+		start = time.perf_counter()
+		value = self.builder(session)
+		INDEX_BUILD_SECONDS.set(time.perf_counter() - start, index=self.name)
+		return value
+
+	def set(self, value: T) -> None:
+		self._value = value
+
+	def rebuild(self) -> T:
+		with self._build_lock:
+			with catalog_session() as session:
+				value = self.build(session)
+			self._value = value
+			return value
+
+	def peek(self) -> Optional[T]:
+		"""Current value without triggering a build."""
+		return self._value
+
+	def get(self) -> T:
+		value = self._value
+		if value is None:
+			# First use before the watcher has built it
+			with self._build_lock:
+				value = self._value if self._value is not None else self.rebuild()
+		return value
+
+
+_indexes: List[DerivedIndex] = []
+
+
+def register_index(name: str, builder: Callable[[Session], T]) -> DerivedIndex[T]:
+	index = DerivedIndex(name, builder)
+	_indexes.append(index)
+	return index
+
+
+def registered_indexes() -> List[DerivedIndex]:
+	return list(_indexes)
+
+
+class CatalogWatcher:
+	"""Polls the catalog version and rebuilds registered indexes when it moves.
+
+	Once started it also owns snapshot switches: a new snapshot file is only
+	published after every index has been built from it, together with the
+	new cache version.
+	"""
+
+	def __init__(self, interval_s: float) -> None:
+		self.interval_s = interval_s
+		self.version: Optional[int] = None
+		self._stop = threading.Event()
+		self._wake = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._switch_lock = threading.Lock()
+
+	def _serve(self, version: int) -> None:
+		self.version = version
+		cache.catalog_version = version
+		CATALOG_VERSION.set(version)
+		logger.info("Serving catalog version %s", version)
+
+	def switch_snapshot(self) -> bool:
+		"""Move to a newly published snapshot; reads stay on the old file until its indexes are built."""
+		if not self._switch_lock.acquire(blocking=False):
+			# Another thread is switching; keep serving the current file meanwhile
+			return False
+		try:
+			change = snapshots.pending()
+			if change is None:
+				return False
+			pointer, name = change
+			if name == snapshots.name:
+				snapshots.publish(pointer, name, None)
+				return False
+			new_engine = snapshots.open(name)
+			try:
+				with Session(new_engine) as session:
+					version = get_catalog_version(session)
+					values = [(index, index.build(session)) for index in _indexes]
+			except Exception:
+				# Stay on the previous file until the pointer moves again
+				logger.exception("Preparing catalog snapshot %s failed", name)
+				new_engine.dispose()
+				snapshots.publish(pointer, name, None)
+				return False
+			snapshots.publish(pointer, name, new_engine)
+			for index, value in values:
+				index.set(value)
+			self._serve(version)
+			return True
+		finally:
+			self._switch_lock.release()
+
+	def request_switch(self) -> None:
+		"""Called by reads that saw the pointer move."""
+		if self._thread is not None:
+			self.wake()
+		else:
+			self.switch_snapshot()
+
+	def poll(self) -> bool:
+		with catalog_session() as session:
+			version = get_catalog_version(session)
+		if version == self.version:
+			return False
+
+		for index in _indexes:
+			try:
+				index.rebuild()
+			except Exception:
+				# Keep serving the previous index; retry on the next poll
+				logger.exception("Rebuilding index %s for catalog version %s failed", index.name, version)
+				return False
+		self._serve(version)
+		return True
+
+	def wake(self) -> None:
+		"""Poll now instead of at the next interval."""
+		self._wake.set()
+
+	def _run(self) -> None:
+		while True:
+			self._wake.wait(self.interval_s)
+			self._wake.clear()
+			if self._stop.is_set():
+				return
+			try:
+				self.switch_snapshot()
+				self.poll()
+			except OperationalError:
+				logger.warning("Catalog version poll failed", exc_info=True)
+
+	def start(self) -> None:
+		snapshots.on_change = self.request_switch
+		self.switch_snapshot()
+		self.poll()
+		if self.interval_s > 0 and self._thread is None:
+			self._stop.clear()
+			self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+			self._thread.start()
+
+	def stop(self) -> None:
+		snapshots.on_change = None
+		self._stop.set()
+		self._wake.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+
+def _build_genre_ids(session: Session) -> Dict[str, int]:
+	return {name: genre_id for genre_id, name in session.exec(select(Genre.id, Genre.name))}
+
+
+genre_ids = register_index("genre_ids", _build_genre_ids)
+
+watcher = CatalogWatcher(settings.CATALOG_POLL_INTERVAL_S)
@@ -13,11 +13,80 @@ _DB_PATH.parent.mkdir(exist_ok=True)
 
 class Settings(BaseSettings):
 	DATABASE_URL: str = f"sqlite:///{_DB_PATH.as_posix()}"
+	# Read-only copies of DATABASE_URL; recommendation and genre reads are spread across them
+	READ_REPLICA_URLS: List[str] = []
+	REPLICA_HEALTH_INTERVAL_S: float = 5.0
 	API_BASE_PATH: str = ""
 	ALLOWED_ORIGINS: List[str] = ["*"]
 	DEFAULT_N: int = 10
 	MAX_N: int = 20
 	SERVICE_VERSION: str = "0.1.0"
+	# Responses smaller than this many bytes are sent uncompressed
+	GZIP_MINIMUM_SIZE: int = 1000
+	# Shared cache for genre lists and candidate pools: memory | sqlite | redis | none
+	CACHE_BACKEND: str = "memory"
+	# SQLite file path or redis:// URL, depending on CACHE_BACKEND
+	CACHE_URL: str = ""
+	CACHE_TTL_S: float = 300.0
+	CACHE_MAX_ENTRIES: int = 1024
+	# Blue/green mode: the seeder writes catalog snapshots here and swaps a pointer file (empty = seed in place)
+	CATALOG_SNAPSHOT_DIR: str = ""
+	# Spread movies over these SQLite files by id hash and read them in parallel (not combined with snapshots)
+	CATALOG_SHARD_URLS: List[str] = []
+	# Threads for scatter-gather shard reads (0 = one per shard)
+	CATALOG_SHARD_WORKERS: int = 0
+	# How often each worker checks the DB catalog version (0 disables the background watcher)
+	CATALOG_POLL_INTERVAL_S: float = 2.0
+	# Per-user "already served" history for user_id requests (Bloom filters, per worker)
+	HISTORY_MAX_USERS: int = 10000
+	HISTORY_CAPACITY: int = 400
+	HISTORY_BITS_PER_USER: int = 4096
+	HISTORY_HASHES: int = 6
+	HISTORY_TTL_S: float = 7 * 24 * 3600
+	# Where the offline ALS job writes factor matrices for /recommendations/personal
+	MODEL_DIR: str = (_BACKEND_DIR / "data" / "model").as_posix()
+	# Inverted lists probed per query when the model ships an ANN index
+	ANN_NPROBE: int = 8
+	# Interaction ingestion: bounded queue flushed in batches by a background writer
+	INGEST_QUEUE_SIZE: int = 10000
+	INGEST_BATCH_SIZE: int = 500
+	INGEST_FLUSH_INTERVAL_S: float = 1.0
+	INGEST_ENQUEUE_TIMEOUT_S: float = 0.05
+	# diversify=true: MMR re-ranking over this many random candidates (relevance vs. genre/year similarity)
+	DIVERSIFY_CANDIDATES: int = 200
+	DIVERSIFY_LAMBDA: float = 0.5
+	DIVERSIFY_YEAR_SCALE: float = 10.0
+	# Adaptive (AIMD) concurrency limit per worker: shrinks when requests exceed the latency target
+	ADMISSION_CONTROL: bool = False
+	ADMISSION_INITIAL_LIMIT: int = 16
+	ADMISSION_MIN_LIMIT: int = 2
+	ADMISSION_MAX_LIMIT: int = 200
+	ADMISSION_LATENCY_TARGET_MS: float = 250.0
+	ADMISSION_BACKOFF: float = 0.9
+	ADMISSION_QUEUE_SIZE: int = 50
+	ADMISSION_QUEUE_TIMEOUT_MS: float = 100.0
+	# Per-client token bucket (requests/second refill, 0 disables); clients keyed by header, else IP
+	RATE_LIMIT_RPS: float = 0.0
+	RATE_LIMIT_BURST: int = 20
+	RATE_LIMIT_KEY_HEADER: str = "X-Client-Id"
+	RATE_LIMIT_MAX_CLIENTS: int = 10000
+	# DB time per pool load in ms (0 = unbounded); past it a cached or precomputed pool is served, marked degraded
+	DB_TIME_BUDGET_MS: float = 0.0
+	# How long a SQLite connection waits on a locked database before failing
+	DB_LOCK_TIMEOUT_S: float = 5.0
+	FALLBACK_POOL_SIZE: int = 200
+	# /admin endpoints require this token in X-Admin-Token (empty = admin endpoints disabled)
+	ADMIN_TOKEN: str = ""
+	# Opt-in tracemalloc tracing, snapshots/diffs and per-request peak sampling under /admin/memory
+	MEMORY_PROFILING: bool = False
+	MEMORY_SAMPLE_RATE: float = 0.01
+	MEMORY_MAX_SNAPSHOTS: int = 5
+	TRACEMALLOC_FRAMES: int = 5
+	# Longest run accepted by the /admin/profile sampling profiler
+	PROFILER_MAX_SECONDS: float = 60.0
+	# Opt-in per-request SQL timing (Server-Timing header) and slow-query log
+	SQL_PROFILING: bool = False
+	SLOW_QUERY_MS: float = 100.0
 
 	class Config:
 		env_file = ".env"
@@ -1,15 +1,319 @@
-from sqlmodel import SQLModel, create_engine
+import contextvars
+import itertools
+import logging
+import threading
+import time
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine
 from .config import settings
+from .metrics import instrument_engine, registry
+
+logger = logging.getLogger(__name__)
+
+REPLICA_READS = registry.counter("db_replica_reads_total", "Read sessions opened per database node")
+REPLICA_HEALTHY = registry.gauge("db_replica_healthy", "1 if the read node passed its last health check")
+SHARD_QUERY_SECONDS = registry.histogram("db_shard_query_seconds", "Time spent on one shard per scatter-gather read")
+
+T = TypeVar("T")
+
+
+def _make_engine(url: str) -> Engine:
+	# For SQLite, ensure check_same_thread=False so sessions can be used in FastAPI
+	new_engine = create_engine(
+		url,
+		echo=False,
+		connect_args={"check_same_thread": False, "timeout": settings.DB_LOCK_TIMEOUT_S} if url.startswith("sqlite") else {},
+	)
+	instrument_engine(new_engine)
+
+	if settings.DB_TIME_BUDGET_MS > 0:
+		from .budget import install as install_time_budget
+
+		install_time_budget(new_engine)
+
+	if settings.SQL_PROFILING:
+		from .profiling import install as install_sql_profiling
+
+		install_sql_profiling(new_engine)
+	return new_engine
+
+
+# Primary: the only engine that receives writes (init_db, seeding, sync)
+engine = _make_engine(settings.DATABASE_URL)
+
+
+class _ReadNode:
+	def __init__(self, name: str, node_engine: Engine) -> None:
+		self.name = name
+		self.engine = node_engine
+		self.healthy = True
+		self.checked_at = 0.0
+
+	def check(self) -> bool:
+		try:
+			with self.engine.connect() as conn:
+				# Touch a catalog table so an empty or unseeded replica counts as down
+				conn.execute(text("SELECT 1 FROM genre LIMIT 1"))
+			healthy = True
+		except OperationalError:
+			healthy = False
+		if healthy != self.healthy:
+			logger.warning("Read node %s is now %s", self.name, "healthy" if healthy else "unhealthy")
+		self.healthy = healthy
+		self.checked_at = time.monotonic()
+		REPLICA_HEALTHY.set(1 if healthy else 0, node=self.name)
+		return healthy
+
+
+class ReplicaRouter:
+	"""Round-robins read sessions across replicas, skipping unhealthy ones.
+
+	Nodes are re-probed with a trivial query at most every `health_interval_s`
+	seconds. When every replica is down, reads fall back to the primary.
+	"""
+
+	def __init__(self, primary: Engine, replica_urls: List[str], health_interval_s: float) -> None:
+		self.primary = _ReadNode("primary", primary)
+		self.nodes = [_ReadNode(f"replica{i}", _make_engine(url)) for i, url in enumerate(replica_urls)]
+		self.health_interval_s = health_interval_s
+		self._cycle = itertools.cycle(range(len(self.nodes))) if self.nodes else None
+		self._lock = threading.Lock()
+
+	def _due(self, node: _ReadNode) -> bool:
+		return time.monotonic() - node.checked_at >= self.health_interval_s
+
+	def pick(self) -> _ReadNode:
+		for _ in range(len(self.nodes)):
+			with self._lock:
+				node = self.nodes[next(self._cycle)]
+			if self._due(node):
+				node.check()
+			if node.healthy:
+				return node
+		return self.primary
+
+	def mark_unhealthy(self, node: _ReadNode) -> None:
+		if node is self.primary:
+			return
+		node.healthy = False
+		node.checked_at = time.monotonic()
+		REPLICA_HEALTHY.set(0, node=node.name)
+
+	def engines(self) -> List[Engine]:
+		return [self.primary.engine] + [node.engine for node in self.nodes]
+
+
+replicas = ReplicaRouter(engine, settings.READ_REPLICA_URLS, settings.REPLICA_HEALTH_INTERVAL_S)
+
+
+SNAPSHOT_POINTER = "CURRENT"
+
+
+def snapshot_url(path: Path) -> str:
+	return f"sqlite:///{path.resolve().as_posix()}"
+
+
+def publish_snapshot(directory: Path, file_name: str) -> None:
+	"""Point readers at `file_name`; a single rename, whatever the catalog size."""
+	tmp = directory / (SNAPSHOT_POINTER + ".tmp")
+	tmp.write_text(file_name, encoding="utf-8")
+	os.replace(tmp, directory / SNAPSHOT_POINTER)
+
 
-# For SQLite, ensure check_same_thread=False so sessions can be used in FastAPI
-engine = create_engine(
-	settings.DATABASE_URL,
-	echo=False,
-	connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
-)
+class CatalogSnapshots:
+	"""Blue/green catalog files selected by a pointer file in CATALOG_SNAPSHOT_DIR.
+
+	The seeder writes each catalog to a new SQLite file and then replaces the
+	`CURRENT` pointer. Every read checks the pointer's identity (one `stat`).
+	When it moved and `on_change` is set (the API's catalog watcher), the
+	watcher opens the new file, rebuilds the worker's indexes from it and
+	only then calls `publish`, so reads stay on the previous file until
+	engine, indexes and cache version can move together. Without `on_change`
+	(scripts) the engine is switched right away. Requests that already hold
+	a session keep reading the previous file until they finish. Until a
+	snapshot is published, or when no directory is configured, catalog reads
+	use the primary database.
+	"""
+
+	def __init__(self, directory: str, fallback: Engine) -> None:
+		self.directory = Path(directory) if directory else None
+		self.fallback = fallback
+		self.name: Optional[str] = None
+		self.engine = fallback
+		# Called on reads while the pointer has moved and the new file is not yet published
+		self.on_change: Optional[Callable[[], None]] = None
+		self._pointer: Optional[Tuple[int, int]] = None
+		self._lock = threading.Lock()
+		self._switch_lock = threading.Lock()
+
+	@property
+	def enabled(self) -> bool:
+		return self.directory is not None
+
+	def current(self) -> Engine:
+		if self.directory is None:
+			return self.fallback
+		change = self.pending()
+		if change is not None:
+			if self.on_change is not None:
+				self.on_change()
+			else:
+				self._switch(*change)
+		return self.engine
+
+	def pending(self) -> Optional[Tuple[Tuple[int, int], str]]:
+		"""(pointer identity, file name) when the pointer moved since the last switch."""
+		if self.directory is None:
+			return None
+		try:
+			st = (self.directory / SNAPSHOT_POINTER).stat()
+		except FileNotFoundError:
+			return None
+		pointer = (st.st_ino, st.st_mtime_ns)
+		if pointer == self._pointer:
+			return None
+		return pointer, (self.directory / SNAPSHOT_POINTER).read_text(encoding="utf-8").strip()
+
+	def open(self, name: str) -> Engine:
+		return _make_engine(snapshot_url(self.directory / name))
+
+	def publish(self, pointer: Tuple[int, int], name: str, new_engine: Optional[Engine]) -> None:
+		"""Serve `name` from now on; `new_engine=None` only records the pointer (same file, or a failed switch)."""
+		with self._lock:
+			previous = self.engine
+			self._pointer = pointer
+			if new_engine is None or name == self.name:
+				return
+			self.engine = new_engine
+			self.name = name
+		if previous is not self.fallback:
+			# Only idle connections close; checked-out ones finish their request
+			previous.dispose()
+		logger.info("Switched catalog to snapshot %s", name)
+
+	def _switch(self, pointer: Tuple[int, int], name: str) -> None:
+		with self._switch_lock:
+			if pointer != self._pointer:
+				self.publish(pointer, name, None if name == self.name else self.open(name))
+
+	def pin(self, pinned: Engine) -> None:
+		"""Serve every catalog read from `pinned` and stop following the pointer (e.g. batch jobs)."""
+		with self._lock:
+			self.directory = None
+			self.fallback = self.engine = pinned
+
+	def url(self) -> str:
+		self.current()
+		return settings.DATABASE_URL if self.name is None else snapshot_url(self.directory / self.name)
+
+
+snapshots = CatalogSnapshots(settings.CATALOG_SNAPSHOT_DIR, engine)
+
+
+def shard_of(movie_id: int, shard_count: int) -> int:
+	# Fibonacci hashing: consecutive ids land on different shards, evenly
+	return ((movie_id * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) % shard_count
+
+
+class CatalogShards:
+	"""Movies spread across CATALOG_SHARD_URLS by a hash of their id.
+
+	Each shard holds its movies' `movie`, `moviedetail` and `moviegenre` rows
+	plus a full copy of `genre`, so genre joins never leave the shard.
+	`scatter` runs one callable per shard on a thread pool and returns the
+	per-shard results in shard order; the caller's context (e.g. the DB time
+	budget) is copied into every task. Without shards it runs the callable
+	once on the caller's session, so callers need no separate code path.
+	"""
+
+	def __init__(self, urls: List[str], workers: int) -> None:
+		self.engines = [_make_engine(url) for url in urls]
+		self._pool = (
+			ThreadPoolExecutor(max_workers=workers or len(urls), thread_name_prefix="catalog-shard") if urls else None
+		)
+
+	@property
+	def enabled(self) -> bool:
+		return bool(self.engines)
+
+	def __len__(self) -> int:
+		return len(self.engines)
+
+	def replace_engines(self, engines: List[Engine]) -> None:
+		# Same shards, different connections (e.g. read-only ones in batch workers)
+		self.engines = engines
+
+	def shard_of(self, movie_id: int) -> int:
+		return shard_of(movie_id, len(self.engines))
+
+	def _run(self, shard: int, fn: Callable[[int, Session], T]) -> T:
+		start = time.perf_counter()
+		try:
+			with Session(self.engines[shard]) as session:
+				return fn(shard, session)
+		finally:
+			SHARD_QUERY_SECONDS.observe(time.perf_counter() - start, shard=str(shard))
+
+	def scatter(self, session: Session, fn: Callable[[int, Session], T]) -> List[T]:
+		if self._pool is None:
+			return [fn(0, session)]
+		futures = [
+			self._pool.submit(contextvars.copy_context().run, self._run, shard, fn) for shard in range(len(self.engines))
+		]
+		return [future.result() for future in futures]
+
+	@contextmanager
+	def session(self, shard: int) -> Iterator[Session]:
+		with Session(self.engines[shard]) as session:
+			yield session
+
+
+shards = CatalogShards(settings.CATALOG_SHARD_URLS, settings.CATALOG_SHARD_WORKERS)
+
+
+@contextmanager
+def catalog_session() -> Iterator[Session]:
+	"""Session on the catalog currently served: the live snapshot, else the primary."""
+	with Session(snapshots.current()) as session:
+		yield session
+
+
+@contextmanager
+def read_session() -> Iterator[Session]:
+	if snapshots.enabled:
+		# Snapshots replace replicas: every worker reads the same immutable file
+		with catalog_session() as session:
+			yield session
+		return
+	node = replicas.pick()
+	REPLICA_READS.inc(node=node.name)
+	with Session(node.engine) as session:
+		try:
+			yield session
+		except OperationalError:
+			# Take the node out of rotation until its next health check
+			replicas.mark_unhealthy(node)
+			raise
 
 
 def init_db() -> None:
 	# Import models to ensure they are registered with SQLModel metadata
 	from . import models  # noqa: F401
+	from .migrations import migrate
+
 	SQLModel.metadata.create_all(engine)
+	migrate(engine)
+	if snapshots.enabled and snapshots.current() is not engine:
+		# Snapshots published before a schema change are upgraded once, in place
+		migrate(snapshots.current())
+	for shard_engine in shards.engines:
+		SQLModel.metadata.create_all(shard_engine)
+		migrate(shard_engine)
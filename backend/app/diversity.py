@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .records import MovieRecord
+
+# Seeded once: default_rng() per call would read OS entropy on every request
+_rng = np.random.default_rng()
+
+
+def genre_matrix(candidates: Sequence[MovieRecord]) -> np.ndarray:
+	"""Row-normalized genre one-hot block, so row dot products are cosine similarities."""
+	columns: Dict[str, int] = {}
+	rows: List[int] = []
+	cols: List[int] = []
+	for i, movie in enumerate(candidates):
+		for name in movie.genres:
+			rows.append(i)
+			cols.append(columns.setdefault(name, len(columns)))
+	block = np.zeros((len(candidates), max(1, len(columns))), dtype=np.float32)
+	block[rows, cols] = 1.0
+	norms = np.linalg.norm(block, axis=1, keepdims=True)
+	return block / np.maximum(norms, 1.0)
+
+
+def mmr_select(
+	candidates: Sequence[MovieRecord],
+	k: int,
+	lambda_: float = 0.5,
+	year_scale: float = 10.0,
+	genre_weight: float = 0.5,
+	relevance: Optional[np.ndarray] = None,
+	rng: Optional[np.random.Generator] = None,
+) -> List[MovieRecord]:
+	"""Pick `k` candidates by maximal marginal relevance.
+
+	Similarity mixes genre cosine and year proximity `exp(-|dy| / year_scale)`.
+	Each greedy step is one matrix-vector product against the latest pick:
+	the running max-similarity vector is updated in place, so the cost is
+	O(k * candidates * genres) and no candidate x candidate matrix is built.
+	Without `relevance` (the genre path has no scores), a random one keeps the
+	result varied between calls.
+	"""
+	n = len(candidates)
+	k = min(k, n)
+	if k == 0:
+		return []
+	if relevance is None:
+		relevance = (rng or _rng).random(n)
+
+	genres = genre_matrix(candidates)
+	years = np.array([np.nan if m.year is None else m.year for m in candidates], dtype=np.float32)
+	max_sim = np.zeros(n, dtype=np.float32)
+	available = np.ones(n, dtype=bool)
+	picked: List[int] = []
+	for _ in range(k):
+		scores = lambda_ * relevance - (1.0 - lambda_) * max_sim
+		scores[~available] = -np.inf
+		j = int(np.argmax(scores))
+		picked.append(j)
+		available[j] = False
+
+		year_sim = np.exp(-np.abs(years - years[j]) / year_scale)
+		# Unknown years are neither close nor far: no year similarity
+		year_sim = np.nan_to_num(year_sim, nan=0.0)
+		sim = genre_weight * (genres @ genres[j]) + (1.0 - genre_weight) * year_sim
+		np.maximum(max_sim, sim, out=max_sim)
+	return [candidates[i] for i in picked]
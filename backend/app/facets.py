@@ -0,0 +1,134 @@
+from itertools import chain
+from typing import List, Optional
+
+import numpy as np
+from sqlmodel import Session, select
+
+from .catalog import register_index
+from .db import shards
+from .models import Genre, Movie, MovieGenre
+
+
+def _all_rows(session: Session, statement) -> list:
+	return list(chain.from_iterable(shards.scatter(session, lambda _, s: s.exec(statement).all())))
+
+
+class Facets:
+	"""Genre counts and year histograms precomputed from columnar catalog arrays.
+
+	Built once per catalog version: the (movie, genre) links and movie years
+	are loaded as NumPy arrays and folded with `bincount` into a
+	genre x year count matrix plus a per-movie year histogram. Requests then
+	only slice and sum these matrices, so no GROUP BY runs per request.
+	"""
+
+	def __init__(
+		self,
+		genre_names: List[str],
+		year_min: Optional[int],
+		genre_year: np.ndarray,
+		genre_no_year: np.ndarray,
+		movie_year: np.ndarray,
+		movies_no_year: int,
+	) -> None:
+		self.genre_names = genre_names
+		self.year_min = year_min
+		self.genre_year = genre_year
+		self.genre_no_year = genre_no_year
+		self.movie_year = movie_year
+		self.movies_no_year = movies_no_year
+
+	@property
+	def year_max(self) -> Optional[int]:
+		if self.year_min is None:
+			return None
+		return self.year_min + self.movie_year.size - 1
+
+	@classmethod
+	def build(cls, session: Session) -> "Facets":
+		genres = session.exec(select(Genre.id, Genre.name).order_by(Genre.name)).all()
+		genre_names = [name for _, name in genres]
+		genre_pos = {genre_id: i for i, (genre_id, _) in enumerate(genres)}
+
+		# Genre ids are the same on every shard, so link rows from all shards line up
+		movie_rows = _all_rows(session, select(Movie.id, Movie.year))
+		movie_ids = np.fromiter((r[0] for r in movie_rows), dtype=np.int64, count=len(movie_rows))
+		# -1 marks a missing year
+		years = np.fromiter((-1 if r[1] is None else r[1] for r in movie_rows), dtype=np.int64, count=len(movie_rows))
+		order = np.argsort(movie_ids)
+		movie_ids, years = movie_ids[order], years[order]
+
+		link_rows = _all_rows(session, select(MovieGenre.movie_id, MovieGenre.genre_id))
+		link_movie = np.fromiter((r[0] for r in link_rows), dtype=np.int64, count=len(link_rows))
+		link_genre = np.fromiter((genre_pos.get(r[1], -1) for r in link_rows), dtype=np.int64, count=len(link_rows))
+		pos = np.minimum(np.searchsorted(movie_ids, link_movie), max(len(movie_ids) - 1, 0))
+		valid = (link_genre >= 0) & (movie_ids[pos] == link_movie) if len(movie_ids) else np.zeros(0, dtype=bool)
+		link_genre, link_year = link_genre[valid], years[pos[valid]]
+
+		n_genres = len(genre_names)
+		dated = years[years >= 0]
+		if dated.size == 0:
+			return cls(
+				genre_names,
+				None,
+				np.zeros((n_genres, 0), dtype=np.int64),
+				np.bincount(link_genre, minlength=n_genres),
+				np.zeros(0, dtype=np.int64),
+				int(years.size),
+			)
+
+		lo, hi = int(dated.min()), int(dated.max())
+		span = hi - lo + 1
+		has_year = link_year >= 0
+		genre_year = np.bincount(
+			link_genre[has_year] * span + (link_year[has_year] - lo), minlength=n_genres * span
+		).reshape(n_genres, span)
+		return cls(
+			genre_names,
+			lo,
+			genre_year,
+			np.bincount(link_genre[~has_year], minlength=n_genres),
+			np.bincount(dated - lo, minlength=span),
+			int((years < 0).sum()),
+		)
+
+	def _year_slice(self, year_min: Optional[int], year_max: Optional[int]) -> slice:
+		if self.year_min is None:
+			return slice(0, 0)
+		lo = 0 if year_min is None else max(0, year_min - self.year_min)
+		hi = self.movie_year.size if year_max is None else max(0, min(self.movie_year.size, year_max - self.year_min + 1))
+		return slice(lo, max(lo, hi))
+
+	def genre_counts(self, year_min: Optional[int] = None, year_max: Optional[int] = None) -> np.ndarray:
+		counts = self.genre_year[:, self._year_slice(year_min, year_max)].sum(axis=1)
+		if year_min is None and year_max is None:
+			# Without a year filter, movies lacking a year still count
+			counts = counts + self.genre_no_year
+		return counts
+
+	def movie_count(self, year_min: Optional[int] = None, year_max: Optional[int] = None) -> int:
+		count = int(self.movie_year[self._year_slice(year_min, year_max)].sum())
+		if year_min is None and year_max is None:
+			count += self.movies_no_year
+		return count
+
+	def year_histograms(
+		self, year_min: Optional[int] = None, year_max: Optional[int] = None
+	) -> List[List[dict]]:
+		"""Non-empty years per genre, in `genre_names` order."""
+		window = self._year_slice(year_min, year_max)
+		return [self._histogram(row, window) for row in self.genre_year[:, window]]
+
+	def year_histogram(
+		self, genre: Optional[str] = None, year_min: Optional[int] = None, year_max: Optional[int] = None
+	) -> List[dict]:
+		window = self._year_slice(year_min, year_max)
+		if genre is None:
+			return self._histogram(self.movie_year[window], window)
+		return self._histogram(self.genre_year[self.genre_names.index(genre), window], window)
+
+	def _histogram(self, counts: np.ndarray, window: slice) -> List[dict]:
+		first = (self.year_min or 0) + window.start
+		return [{"year": first + int(i), "count": int(counts[i])} for i in np.flatnonzero(counts)]
+
+facets_index = register_index("facets", Facets.build)
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from .config import settings
+from .memprofile import track
+from .metrics import registry
+
+HISTORY_USERS = registry.gauge("history_users", "Users with a tracked recommendation history")
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(x: int) -> int:
+	# splitmix64 finalizer: cheap, well-distributed integer hash
+	x = (x + 0x9E3779B97F4A7C15) & _MASK64
+	x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+	x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+	return x ^ (x >> 31)
+
+
+class BloomFilter:
+	__slots__ = ("bits", "num_bits", "num_hashes", "count")
+
+	def __init__(self, num_bits: int, num_hashes: int) -> None:
+		self.bits = bytearray((num_bits + 7) // 8)
+		self.num_bits = num_bits
+		self.num_hashes = num_hashes
+		self.count = 0
+
+	def _positions(self, item: int) -> Iterable[int]:
+		# Double hashing: h1 + i*h2 gives k independent-enough probes from one mix
+		h = _mix(item)
+		h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+		return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+	def add(self, item: int) -> None:
+		for pos in self._positions(item):
+			self.bits[pos >> 3] |= 1 << (pos & 7)
+		self.count += 1
+
+	def __contains__(self, item: int) -> bool:
+		return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class SeenSet:
+	"""Movies served to one user, as two generations of Bloom filters.
+
+	Once the current generation holds `capacity` ids it becomes the previous
+	one and the older generation is dropped, so memory stays fixed and the
+	oldest history expires first. Lookups may report a false positive (an
+	unseen movie treated as seen) but never a false negative.
+	"""
+
+	__slots__ = ("current", "previous", "capacity", "touched_at")
+
+	def __init__(self, capacity: int, num_bits: int, num_hashes: int) -> None:
+		self.capacity = capacity
+		self.current = BloomFilter(num_bits, num_hashes)
+		self.previous: Optional[BloomFilter] = None
+		self.touched_at = time.monotonic()
+
+	def add(self, movie_id: int) -> None:
+		if self.current.count >= self.capacity:
+			self.previous = self.current
+			self.current = BloomFilter(self.current.num_bits, self.current.num_hashes)
+		self.current.add(movie_id)
+
+	def __contains__(self, movie_id: int) -> bool:
+		return movie_id in self.current or (self.previous is not None and movie_id in self.previous)
+
+
+class HistoryStore:
+	"""Per-process LRU of SeenSets; idle users expire after `ttl_s`."""
+
+	def __init__(self, max_users: int, capacity: int, num_bits: int, num_hashes: int, ttl_s: float) -> None:
+		self.max_users = max_users
+		self.capacity = capacity
+		self.num_bits = num_bits
+		self.num_hashes = num_hashes
+		self.ttl_s = ttl_s
+		self._users: "OrderedDict[str, SeenSet]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, user_id: str) -> Optional[SeenSet]:
+		with self._lock:
+			seen = self._users.get(user_id)
+			if seen is None:
+				return None
+			if time.monotonic() - seen.touched_at > self.ttl_s:
+				del self._users[user_id]
+				return None
+			return seen
+
+	def record(self, user_id: str, movie_ids: Iterable[int]) -> None:
+		with self._lock:
+			seen = self._users.get(user_id)
+			if seen is None or time.monotonic() - seen.touched_at > self.ttl_s:
+				seen = self._users[user_id] = SeenSet(self.capacity, self.num_bits, self.num_hashes)
+			self._users.move_to_end(user_id)
+			for movie_id in movie_ids:
+				seen.add(movie_id)
+			seen.touched_at = time.monotonic()
+			while len(self._users) > self.max_users:
+				self._users.popitem(last=False)
+			HISTORY_USERS.set(len(self._users))
+
+
+history = HistoryStore(
+	max_users=settings.HISTORY_MAX_USERS,
+	capacity=settings.HISTORY_CAPACITY,
+	num_bits=settings.HISTORY_BITS_PER_USER,
+	num_hashes=settings.HISTORY_HASHES,
+	ttl_s=settings.HISTORY_TTL_S,
+)
+track("history", lambda: history)
@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from sqlalchemy.exc import DataError, IntegrityError, OperationalError
+from sqlmodel import Session
+
+from .config import settings
+from .db import engine
+from .metrics import registry
+from .repositories import InteractionRepository
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = registry.gauge("ingest_queue_depth", "Interaction events waiting to be written")
+EVENTS_WRITTEN = registry.counter("ingest_events_written_total", "Interaction events written to the database")
+EVENTS_REJECTED = registry.counter("ingest_events_rejected_total", "Interaction events rejected because the queue was full")
+EVENTS_DROPPED = registry.counter("ingest_events_dropped_total", "Interaction events the database refused to store")
+FLUSH_SECONDS = registry.histogram("ingest_flush_duration_seconds", "Duration of one batched write")
+
+# Attempts per write when the database is busy or briefly unavailable, with doubling backoff
+WRITE_ATTEMPTS = 3
+WRITE_BACKOFF_S = 0.1
+
+
+class QueueFull(Exception):
+	pass
+
+
+class EventWriter:
+	"""Bounded in-process queue drained by one background writer thread.
+
+	A flush happens when `batch_size` events are waiting or `flush_interval_s`
+	has passed since the last one, and writes the whole batch with a single
+	executemany INSERT and one commit. A batch with rows the database rejects
+	(integrity or data errors) is split in halves until the offending events
+	are isolated, so one bad row only costs itself. A batch that still fails
+	with a locked or unreachable database goes back to the front of the queue
+	and is retried whole (dropped only on shutdown). Producers that find the queue full wait
+	up to `enqueue_timeout_s` and then get QueueFull, which the API turns into
+	a 503 so clients back off instead of growing memory without bound.
+	"""
+
+	def __init__(self, capacity: int, batch_size: int, flush_interval_s: float, enqueue_timeout_s: float) -> None:
+		self.capacity = capacity
+		self.batch_size = batch_size
+		self.flush_interval_s = flush_interval_s
+		self.enqueue_timeout_s = enqueue_timeout_s
+		self._events: Deque[dict] = deque()
+		self._cond = threading.Condition()
+		self._stopping = False
+		self._thread: Optional[threading.Thread] = None
+
+	def start(self) -> None:
+		with self._cond:
+			if self._thread is not None and self._thread.is_alive():
+				return
+			self._stopping = False
+			self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+			self._thread.start()
+
+	def stop(self) -> None:
+		"""Flush everything still queued, then stop the writer thread."""
+		with self._cond:
+			self._stopping = True
+			self._cond.notify_all()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+	def enqueue(self, events: List[dict]) -> None:
+		if len(events) > self.capacity:
+			raise ValueError("Batch is larger than the ingest queue")
+		self.start()
+		now = time.time()
+		deadline = time.monotonic() + self.enqueue_timeout_s
+		with self._cond:
+			# All-or-nothing, so a rejected batch can simply be retried
+			while len(self._events) + len(events) > self.capacity:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					EVENTS_REJECTED.inc(len(events))
+					raise QueueFull()
+				self._cond.wait(remaining)
+			for event in events:
+				event.setdefault("created_at", now)
+				self._events.append(event)
+			QUEUE_DEPTH.set(len(self._events))
+			if len(self._events) >= self.batch_size:
+				self._cond.notify_all()
+
+	def _take_batch(self) -> List[dict]:
+		with self._cond:
+			deadline = time.monotonic() + self.flush_interval_s
+			while not self._stopping and len(self._events) < self.batch_size:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					break
+				self._cond.wait(remaining)
+			count = min(len(self._events), self.batch_size)
+			batch = [self._events.popleft() for _ in range(count)]
+			QUEUE_DEPTH.set(len(self._events))
+			# Wake producers blocked on a full queue
+			self._cond.notify_all()
+			return batch
+
+	def _write(self, batch: List[dict]) -> None:
+		for attempt in range(WRITE_ATTEMPTS):
+			try:
+				with FLUSH_SECONDS.time():
+					with Session(engine) as session:
+						InteractionRepository.add_many(session, batch)
+				break
+			except OperationalError:
+				# Locked or unreachable database: worth retrying as is
+				if attempt == WRITE_ATTEMPTS - 1:
+					raise
+				time.sleep(WRITE_BACKOFF_S * 2 ** attempt)
+		EVENTS_WRITTEN.inc(len(batch))
+
+	def _flush(self, batch: List[dict]) -> None:
+		try:
+			self._write(batch)
+			return
+		except (IntegrityError, DataError):
+			if len(batch) == 1:
+				EVENTS_DROPPED.inc()
+				logger.exception("Dropping interaction event %s rejected by the database", batch[0])
+				return
+		except OperationalError:
+			self._requeue(batch)
+			return
+		except Exception:
+			EVENTS_DROPPED.inc(len(batch))
+			logger.exception("Dropping %d interaction events after a failed write", len(batch))
+			return
+		middle = len(batch) // 2
+		self._flush(batch[:middle])
+		self._flush(batch[middle:])
+
+	def _requeue(self, batch: List[dict]) -> None:
+		with self._cond:
+			if self._stopping:
+				EVENTS_DROPPED.inc(len(batch))
+				logger.exception("Dropping %d interaction events on shutdown: database unavailable", len(batch))
+				return
+			logger.warning("Database unavailable; %d interaction events stay queued", len(batch), exc_info=True)
+			# Ahead of newer events; producers wait (or get a 503) while the queue is over capacity
+			self._events.extendleft(reversed(batch))
+			QUEUE_DEPTH.set(len(self._events))
+
+	def _run(self) -> None:
+		while True:
+			batch = self._take_batch()
+			if batch:
+				self._flush(batch)
+			with self._cond:
+				if self._stopping and not self._events:
+					return
+
+
+event_writer = EventWriter(
+	capacity=settings.INGEST_QUEUE_SIZE,
+	batch_size=settings.INGEST_BATCH_SIZE,
+	flush_interval_s=settings.INGEST_FLUSH_INTERVAL_S,
+	enqueue_timeout_s=settings.INGEST_ENQUEUE_TIMEOUT_S,
+)
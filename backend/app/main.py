@@ -1,13 +1,34 @@
-from fastapi import FastAPI
+import math
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
+from .admission import AdaptiveLimiter, Overloaded
+from .catalog import watcher as catalog_watcher
 from .config import settings
 from .db import init_db
+from .ingest import event_writer
+from . import memprofile
+from .metrics import REQUEST_LATENCY, REQUESTS_TOTAL
+from .profiling import begin_request, server_timing
+from .ratelimit import RATE_LIMITED, limiter
 from .routers.health import router as health_router
 from .routers.genres import router as genres_router
 from .routers.recommendations import router as recommendations_router
+from .routers.metrics import router as metrics_router
+from .routers.interactions import router as interactions_router
+from .routers.movies import router as movies_router
+from .routers.facets import router as facets_router
+from .routers.admin import router as admin_router
 
-app = FastAPI(title="Movie Recommendations API", version=settings.SERVICE_VERSION)
+app = FastAPI(
+	title="Movie Recommendations API",
+	version=settings.SERVICE_VERSION,
+	default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
 	CORSMiddleware,
@@ -16,13 +37,117 @@ app.add_middleware(
 	allow_methods=["*"],
 	allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
+
+if settings.ADMISSION_CONTROL:
+	_ADMISSION_EXEMPT = {f"{settings.API_BASE_PATH}/health", f"{settings.API_BASE_PATH}/metrics"}
+	admission = AdaptiveLimiter(
+		initial=settings.ADMISSION_INITIAL_LIMIT,
+		min_limit=settings.ADMISSION_MIN_LIMIT,
+		max_limit=settings.ADMISSION_MAX_LIMIT,
+		target_s=settings.ADMISSION_LATENCY_TARGET_MS / 1000.0,
+		backoff=settings.ADMISSION_BACKOFF,
+		queue_size=settings.ADMISSION_QUEUE_SIZE,
+		queue_timeout_s=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000.0,
+	)
+
+	# Registered before record_request_metrics so shed requests still show up there
+	@app.middleware("http")
+	async def admission_control(request: Request, call_next):
+		if request.url.path in _ADMISSION_EXEMPT:
+			return await call_next(request)
+		try:
+			await admission.acquire()
+		except Overloaded:
+			return ORJSONResponse({"detail": "Server overloaded"}, status_code=503, headers={"Retry-After": "1"})
+		start = time.perf_counter()
+		try:
+			return await call_next(request)
+		finally:
+			admission.release(time.perf_counter() - start)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+	start = time.perf_counter()
+	status = "500"
+	try:
+		response = await call_next(request)
+		status = str(response.status_code)
+		return response
+	finally:
+		# Label by route template rather than raw path to keep cardinality bounded
+		route = request.scope.get("route")
+		path = getattr(route, "path", "unmatched")
+		REQUEST_LATENCY.observe(time.perf_counter() - start, route=path)
+		REQUESTS_TOTAL.inc(route=path, status=status)
+
+
+if settings.SQL_PROFILING:
+
+	@app.middleware("http")
+	async def attach_sql_timing(request: Request, call_next):
+		stats = begin_request()
+		response = await call_next(request)
+		# Streamed bodies (no Content-Length) run their queries after the headers are sent
+		if "content-length" in response.headers:
+			response.headers.append("Server-Timing", server_timing(stats))
+		return response
+
+
+if settings.RATE_LIMIT_RPS > 0:
+	_RATE_LIMIT_EXEMPT = {f"{settings.API_BASE_PATH}/health", f"{settings.API_BASE_PATH}/metrics"}
+
+	@app.middleware("http")
+	async def rate_limit(request: Request, call_next):
+		if request.url.path in _RATE_LIMIT_EXEMPT:
+			return await call_next(request)
+		client = request.headers.get(settings.RATE_LIMIT_KEY_HEADER) or (request.client.host if request.client else "")
+		wait_s = limiter.acquire(client)
+		if wait_s > 0:
+			RATE_LIMITED.inc()
+			return ORJSONResponse(
+				{"detail": "Rate limit exceeded"},
+				status_code=429,
+				headers={"Retry-After": str(max(1, math.ceil(wait_s)))},
+			)
+		return await call_next(request)
+
+
+if settings.MEMORY_PROFILING:
+
+	@app.middleware("http")
+	async def sample_request_memory(request: Request, call_next):
+		if not memprofile.should_sample():
+			return await call_next(request)
+		baseline = memprofile.begin_sample()
+		response = await call_next(request)
+		route = getattr(request.scope.get("route"), "path", "unmatched")
+		memprofile.end_sample(route, baseline)
+		return response
 
 
 @app.on_event("startup")
 def on_startup() -> None:
+	memprofile.start()
 	init_db()
+	catalog_watcher.start()
+	event_writer.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+	catalog_watcher.stop()
+	# Flush queued interaction events before the process exits
+	event_writer.stop()
 
 
 app.include_router(health_router, prefix=settings.API_BASE_PATH)
 app.include_router(genres_router, prefix=settings.API_BASE_PATH)
 app.include_router(recommendations_router, prefix=settings.API_BASE_PATH)
+app.include_router(metrics_router, prefix=settings.API_BASE_PATH)
+app.include_router(interactions_router, prefix=settings.API_BASE_PATH)
+app.include_router(movies_router, prefix=settings.API_BASE_PATH)
+app.include_router(facets_router, prefix=settings.API_BASE_PATH)
+app.include_router(admin_router, prefix=settings.API_BASE_PATH)
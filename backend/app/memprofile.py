@@ -0,0 +1,229 @@
+import gc
+import os
+import random
+import sys
+import threading
+import tracemalloc
+import types
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .metrics import registry
+
+REQUEST_PEAK_BYTES = registry.histogram(
+	"request_peak_alloc_bytes",
+	"Peak traced allocation during sampled requests",
+	(64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6),
+)
+
+# Frames that belong to the profiler itself, hidden from snapshot reports
+_IGNORED = (
+	tracemalloc.Filter(False, tracemalloc.__file__),
+	tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+	tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+# Stop walking an object graph after this many objects
+SIZE_WALK_LIMIT = 2_000_000
+
+# Shared program structure, not data owned by a cache or index
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+_snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+_snapshots_lock = threading.Lock()
+_samples: Deque[Dict[str, Any]] = deque(maxlen=500)
+_tracked: Dict[str, Callable[[], Any]] = {}
+
+
+class ProfilingDisabled(Exception):
+	pass
+
+
+def start() -> None:
+	if settings.MEMORY_PROFILING and not tracemalloc.is_tracing():
+		tracemalloc.start(settings.TRACEMALLOC_FRAMES)
+
+
+def track(name: str, getter: Callable[[], Any]) -> None:
+	"""Include `getter()` in size reports; catalog indexes are included automatically."""
+	_tracked[name] = getter
+
+
+def _require_tracing() -> None:
+	if not tracemalloc.is_tracing():
+		raise ProfilingDisabled("Memory profiling is off; set MEMORY_PROFILING=true")
+
+
+def _rss_bytes() -> Optional[int]:
+	try:
+		with open("/proc/self/statm", encoding="ascii") as fh:
+			return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+	except (OSError, ValueError):
+		return None
+
+
+def status() -> dict:
+	tracing = tracemalloc.is_tracing()
+	current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+	return {
+		"tracing": tracing,
+		"traced_current_bytes": current,
+		"traced_peak_bytes": peak,
+		"rss_bytes": _rss_bytes(),
+		"sample_rate": settings.MEMORY_SAMPLE_RATE,
+		"snapshots": list(_snapshots),
+		"request_peaks": request_peaks(),
+	}
+
+
+def _top(stats, limit: int) -> List[dict]:
+	return [
+		{
+			"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+			"size_bytes": stat.size,
+			"count": stat.count,
+		}
+		for stat in stats[:limit]
+	]
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+	return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+
+def take_snapshot(label: str, limit: int = 20) -> dict:
+	_require_tracing()
+	snapshot = _snapshot()
+	with _snapshots_lock:
+		_snapshots[label] = snapshot
+		_snapshots.move_to_end(label)
+		# Snapshots hold every live trace; keep only a few
+		while len(_snapshots) > settings.MEMORY_MAX_SNAPSHOTS:
+			_snapshots.popitem(last=False)
+	stats = snapshot.statistics("lineno")
+	return {
+		"label": label,
+		"total_bytes": sum(stat.size for stat in stats),
+		"top": _top(stats, limit),
+	}
+
+
+def diff(base: str, target: Optional[str] = None, limit: int = 20) -> dict:
+	"""Allocation growth from snapshot `base` to `target` (default: right now)."""
+	_require_tracing()
+	with _snapshots_lock:
+		old = _snapshots.get(base)
+		new = _snapshots.get(target) if target is not None else None
+	if old is None or (target is not None and new is None):
+		raise KeyError(target if old is not None else base)
+	if new is None:
+		new = _snapshot()
+	stats = new.compare_to(old, "lineno")
+	return {
+		"base": base,
+		"target": target or "now",
+		"size_diff_bytes": sum(stat.size_diff for stat in stats),
+		"top": [
+			{
+				"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+				"size_diff_bytes": stat.size_diff,
+				"count_diff": stat.count_diff,
+				"size_bytes": stat.size,
+			}
+			for stat in stats[:limit]
+		],
+	}
+
+
+def should_sample() -> bool:
+	return tracemalloc.is_tracing() and random.random() < settings.MEMORY_SAMPLE_RATE
+
+
+def begin_sample() -> int:
+	# The peak is process-wide: concurrent requests inflate each other's numbers
+	tracemalloc.reset_peak()
+	return tracemalloc.get_traced_memory()[0]
+
+
+def end_sample(route: str, baseline: int) -> None:
+	peak = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+	REQUEST_PEAK_BYTES.observe(peak, route=route)
+	_samples.append({"route": route, "peak_bytes": peak})
+
+
+def request_peaks() -> Dict[str, dict]:
+	by_route: Dict[str, List[int]] = {}
+	for sample in list(_samples):
+		by_route.setdefault(sample["route"], []).append(sample["peak_bytes"])
+	report = {}
+	for route, peaks in by_route.items():
+		peaks.sort()
+		report[route] = {"samples": len(peaks), "p50_bytes": peaks[len(peaks) // 2], "max_bytes": peaks[-1]}
+	return report
+
+
+def deep_size(obj: Any, limit: int = SIZE_WALK_LIMIT) -> Tuple[int, int, bool]:
+	"""(heap bytes, memory-mapped bytes, truncated) reachable from `obj`.
+
+	Shared objects (e.g. interned genre names) are counted once. NumPy arrays
+	count their buffers; memory-mapped ones are reported separately because
+	their pages belong to the OS page cache, not to this worker.
+	"""
+	seen = set()
+	stack = [obj]
+	heap = mapped = 0
+	while stack:
+		if len(seen) >= limit:
+			return heap, mapped, True
+		item = stack.pop()
+		if id(item) in seen or isinstance(item, _OPAQUE):
+			continue
+		seen.add(id(item))
+		if isinstance(item, np.memmap):
+			mapped += item.nbytes
+			continue
+		heap += sys.getsizeof(item)
+		if isinstance(item, np.ndarray):
+			# getsizeof covers owned buffers; views point at the array that owns theirs
+			if item.base is not None:
+				stack.append(item.base)
+			continue
+		if isinstance(item, (str, bytes, bytearray, int, float, bool)) or item is None:
+			continue
+		if isinstance(item, dict):
+			stack.extend(item.keys())
+			stack.extend(item.values())
+		elif isinstance(item, (list, tuple, set, frozenset, deque)):
+			stack.extend(item)
+		else:
+			stack.extend(gc.get_referents(item))
+	return heap, mapped, False
+
+
+def _describe(value: Any) -> dict:
+	if value is None:
+		return {"built": False}
+	heap, mapped, truncated = deep_size(value)
+	out: Dict[str, Any] = {"type": type(value).__name__, "heap_bytes": heap}
+	if mapped:
+		out["mapped_bytes"] = mapped
+	if truncated:
+		out["truncated"] = True
+	if hasattr(value, "__len__"):
+		try:
+			out["entries"] = len(value)
+		except TypeError:
+			pass
+	return out
+
+
+def size_report() -> Dict[str, dict]:
+	from .catalog import registered_indexes
+
+	report = {f"index:{index.name}": _describe(index.peek()) for index in registered_indexes()}
+	for name, getter in _tracked.items():
+		report[name] = _describe(getter())
+	return report
@@ -0,0 +1,175 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Latency buckets in seconds (upper bounds, +Inf is implicit)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Pool size buckets in movies
+SIZE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000, 100000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+	return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+	pairs = list(key) + list(extra)
+	if not pairs:
+		return ""
+	return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+	if value == float("inf"):
+		return "+Inf"
+	return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+	def __init__(self, name: str, help_text: str) -> None:
+		self.name = name
+		self.help = help_text
+		self._values: Dict[LabelKey, float] = {}
+		self._lock = threading.Lock()
+
+	def inc(self, amount: float = 1.0, **labels: str) -> None:
+		key = _label_key(labels)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0.0) + amount
+
+	def get(self, **labels: str) -> float:
+		return self._values.get(_label_key(labels), 0.0)
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+		with self._lock:
+			for key, value in sorted(self._values.items()):
+				lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+		return lines
+
+
+class Gauge:
+	def __init__(self, name: str, help_text: str) -> None:
+		self.name = name
+		self.help = help_text
+		self._values: Dict[LabelKey, float] = {}
+		self._lock = threading.Lock()
+
+	def set(self, value: float, **labels: str) -> None:
+		with self._lock:
+			self._values[_label_key(labels)] = value
+
+	def get(self, **labels: str) -> float:
+		return self._values.get(_label_key(labels), 0.0)
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+		with self._lock:
+			for key, value in sorted(self._values.items()):
+				lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+		return lines
+
+
+class Histogram:
+	def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+		self.name = name
+		self.help = help_text
+		self.buckets = tuple(sorted(buckets))
+		# label key -> [per-bucket counts..., +Inf count, sum]
+		self._series: Dict[LabelKey, List[float]] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, value: float, **labels: str) -> None:
+		key = _label_key(labels)
+		idx = bisect.bisect_left(self.buckets, value)
+		with self._lock:
+			series = self._series.get(key)
+			if series is None:
+				series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+			series[idx] += 1
+			series[-1] += value
+
+	@contextmanager
+	def time(self, **labels: str) -> Iterator[None]:
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.observe(time.perf_counter() - start, **labels)
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+		with self._lock:
+			for key, series in sorted(self._series.items()):
+				cumulative = 0.0
+				for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+					cumulative += count
+					lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {_format_value(cumulative)}")
+				lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-1])}")
+				lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(cumulative)}")
+		return lines
+
+
+class Registry:
+	def __init__(self) -> None:
+		self._metrics: Dict[str, object] = {}
+		self._lock = threading.Lock()
+
+	def _register(self, metric):
+		with self._lock:
+			return self._metrics.setdefault(metric.name, metric)
+
+	def counter(self, name: str, help_text: str) -> Counter:
+		return self._register(Counter(name, help_text))
+
+	def gauge(self, name: str, help_text: str) -> Gauge:
+		return self._register(Gauge(name, help_text))
+
+	def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+		return self._register(Histogram(name, help_text, buckets))
+
+	def render(self) -> str:
+		lines: List[str] = []
+		for name in sorted(self._metrics):
+			lines.extend(self._metrics[name].render())
+		return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram("http_request_duration_seconds", "HTTP request latency by route")
+REQUESTS_TOTAL = registry.counter("http_requests_total", "HTTP requests by route and status code")
+STAGE_LATENCY = registry.histogram("recommendation_stage_duration_seconds", "Time spent in each recommendation stage")
+POOL_SIZE = registry.histogram("recommendation_pool_size", "Candidate pool size per recommendation", SIZE_BUCKETS)
+SQL_STATEMENTS = registry.counter("sql_statements_total", "SQL statements executed")
+CACHE_REQUESTS = registry.counter("cache_requests_total", "Cache lookups by cache and result")
+CACHE_HIT_RATIO = registry.gauge("cache_hit_ratio", "Fraction of cache lookups that were hits")
+
+
+def stage(name: str):
+	return STAGE_LATENCY.time(stage=name)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+	CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+	hits = CACHE_REQUESTS.get(cache=cache, result="hit")
+	misses = CACHE_REQUESTS.get(cache=cache, result="miss")
+	CACHE_HIT_RATIO.set(hits / (hits + misses), cache=cache)
+
+
+def instrument_engine(engine) -> None:
+	@event.listens_for(engine, "after_cursor_execute")
+	def _count_statement(conn, cursor, statement, parameters, context, executemany):
+		verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+		SQL_STATEMENTS.inc(statement=verb)
@@ -0,0 +1,38 @@
+import logging
+from typing import Callable, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+
+def split_movie_detail(conn: Connection) -> bool:
+	"""Move overview/poster_url out of `movie` into `moviedetail` and add `popularity`."""
+	columns = {c["name"] for c in inspect(conn).get_columns("movie")}
+	if "overview" not in columns:
+		return False
+	if "popularity" not in columns:
+		conn.execute(text("ALTER TABLE movie ADD COLUMN popularity FLOAT NOT NULL DEFAULT 0"))
+	conn.execute(
+		text(
+			"INSERT INTO moviedetail (movie_id, overview, poster_url) "
+			"SELECT id, overview, poster_url FROM movie "
+			"WHERE id NOT IN (SELECT movie_id FROM moviedetail)"
+		)
+	)
+	# Needs SQLite >= 3.35; rewrites every movie row without the cold columns
+	conn.execute(text("ALTER TABLE movie DROP COLUMN overview"))
+	conn.execute(text("ALTER TABLE movie DROP COLUMN poster_url"))
+	return True
+
+
+# Applied in order by init_db after create_all; each one detects whether it is still needed
+MIGRATIONS: List[Callable[[Connection], bool]] = [split_movie_detail]
+
+
+def migrate(engine: Engine) -> None:
+	for migration in MIGRATIONS:
+		with engine.begin() as conn:
+			if migration(conn):
+				logger.info("Applied migration %s", migration.__name__)
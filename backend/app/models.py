@@ -1,3 +1,4 @@
+import time
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
 
@@ -8,13 +9,20 @@ class MovieGenre(SQLModel, table=True):
 
 
 class Movie(SQLModel, table=True):
+	# Hot columns only, so genre/year scans touch narrow rows; long text lives in MovieDetail
 	id: Optional[int] = Field(default=None, primary_key=True)
 	title: str = Field(index=True)
 	year: Optional[int] = Field(default=None, index=True)
-	overview: Optional[str] = None
-	poster_url: Optional[str] = None
+	popularity: float = 0.0
 
 	genres: List["Genre"] = Relationship(back_populates="movies", link_model=MovieGenre)
+	detail: Optional["MovieDetail"] = Relationship(sa_relationship_kwargs={"uselist": False})
+
+
+class MovieDetail(SQLModel, table=True):
+	movie_id: Optional[int] = Field(default=None, foreign_key="movie.id", primary_key=True)
+	overview: Optional[str] = None
+	poster_url: Optional[str] = None
 
 
 class Genre(SQLModel, table=True):
@@ -22,3 +30,18 @@ class Genre(SQLModel, table=True):
 	name: str = Field(index=True, unique=True)
 
 	movies: List[Movie] = Relationship(back_populates="genres", link_model=MovieGenre)
+
+
+class CatalogVersion(SQLModel, table=True):
+	# Single row (id=1) bumped by every writer that changes the catalog
+	id: Optional[int] = Field(default=None, primary_key=True)
+	version: int = 0
+	updated_at: float = 0.0
+
+
+class Interaction(SQLModel, table=True):
+	id: Optional[int] = Field(default=None, primary_key=True)
+	user_id: str = Field(index=True)
+	movie_id: int = Field(foreign_key="movie.id", index=True)
+	event: str
+	created_at: float = Field(default_factory=time.time)
@@ -0,0 +1,123 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .ann import IVFIndex
+from .config import settings
+from .memprofile import track
+
+# Implicit-feedback strength per event type; the trainer turns these into ALS confidences
+EVENT_WEIGHTS = {"click": 1.0, "like": 3.0, "watch": 5.0}
+
+USER_FACTORS_FILE = "user_factors.npy"
+ITEM_FACTORS_FILE = "item_factors.npy"
+ITEM_IDS_FILE = "item_ids.npy"
+USER_ITEMS_FILE = "user_items.npz"
+META_FILE = "meta.json"
+ANN_DIR = "ann"
+# MODEL_DIR/CURRENT names the published version directory; files in a version are never rewritten
+MODEL_POINTER = "CURRENT"
+
+
+class FactorModel:
+	"""Trained user/item factors loaded from MODEL_DIR.
+
+	Factor matrices are memory-mapped, so workers share the OS page cache
+	instead of each holding a private copy. `item_ids` is sorted, which
+	lets movie ids be mapped to rows with one `searchsorted`.
+	"""
+
+	def __init__(self, model_dir: Path) -> None:
+		meta = json.loads((model_dir / META_FILE).read_text(encoding="utf-8"))
+		self.meta = meta
+		self.user_index: Dict[str, int] = {u: i for i, u in enumerate(meta["users"])}
+		self.user_factors = np.load(model_dir / USER_FACTORS_FILE, mmap_mode="r")
+		self.item_factors = np.load(model_dir / ITEM_FACTORS_FILE, mmap_mode="r")
+		self.item_ids = np.load(model_dir / ITEM_IDS_FILE)
+		self.user_items = sp.load_npz(model_dir / USER_ITEMS_FILE).tocsr()
+		self.popular = np.asarray(meta["popular"], dtype=np.int64)
+		ann_dir = model_dir / ANN_DIR
+		self.ann: Optional[IVFIndex] = IVFIndex.load(ann_dir) if (ann_dir / "meta.json").exists() else None
+
+	def knows(self, user_id: str) -> bool:
+		return user_id in self.user_index
+
+	def _rows_for(self, movie_ids: Sequence[int]) -> np.ndarray:
+		ids = np.asarray(movie_ids, dtype=self.item_ids.dtype)
+		pos = np.searchsorted(self.item_ids, ids)
+		pos = np.minimum(pos, len(self.item_ids) - 1)
+		return pos[self.item_ids[pos] == ids]
+
+	def recommend(self, user_id: str, k: int, candidate_ids: Optional[Sequence[int]] = None) -> List[int]:
+		u = self.user_index[user_id]
+		rows = np.arange(len(self.item_ids)) if candidate_ids is None else self._rows_for(candidate_ids)
+		if rows.size == 0:
+			return []
+
+		scores = self.item_factors[rows] @ self.user_factors[u]
+		# Never re-recommend what the user already interacted with
+		seen = self.user_items.indices[self.user_items.indptr[u]:self.user_items.indptr[u + 1]]
+		scores[np.isin(rows, seen)] = -np.inf
+
+		k = min(k, rows.size)
+		top = np.argpartition(-scores, k - 1)[:k]
+		top = top[np.argsort(-scores[top])]
+		top = top[np.isfinite(scores[top])]
+		return self.item_ids[rows[top]].tolist()
+
+	def recommend_ann(
+		self,
+		user_id: str,
+		k: int,
+		genre_id: Optional[int] = None,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+	) -> List[int]:
+		u = self.user_index[user_id]
+		seen = self.user_items.indices[self.user_items.indptr[u]:self.user_items.indptr[u + 1]]
+		rows, _ = self.ann.search(
+			self.user_factors[u],
+			k,
+			nprobe=settings.ANN_NPROBE,
+			genre_id=genre_id,
+			year_min=year_min,
+			year_max=year_max,
+			exclude_rows=seen,
+		)
+		return self.item_ids[rows].tolist()
+
+	def popular_ids(self, k: int) -> List[int]:
+		return self.item_ids[self.popular[:k]].tolist()
+
+
+_model: Optional[FactorModel] = None
+_model_pointer: Optional[Tuple[int, int]] = None
+_lock = threading.Lock()
+track("model", lambda: _model)
+
+
+def get_model() -> Optional[FactorModel]:
+	"""Current model, reloaded when the trainer publishes a new version.
+
+	The trainer writes each model into its own directory and then replaces
+	the `CURRENT` pointer, so files a worker has memory-mapped are never
+	modified; the previous model keeps serving until the new one is loaded.
+	"""
+	global _model, _model_pointer
+	model_dir = Path(settings.MODEL_DIR)
+	try:
+		st = (model_dir / MODEL_POINTER).stat()
+	except FileNotFoundError:
+		return None
+	pointer = (st.st_ino, st.st_mtime_ns)
+	if pointer != _model_pointer:
+		with _lock:
+			if pointer != _model_pointer:
+				name = (model_dir / MODEL_POINTER).read_text(encoding="utf-8").strip()
+				_model = FactorModel(model_dir / name)
+				_model_pointer = pointer
+	return _model
@@ -0,0 +1,92 @@
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger("backend.sql")
+
+# Most recent slow statements with their query plans, newest last
+SLOW_QUERIES: Deque[Dict] = deque(maxlen=100)
+
+
+@dataclass
+class SQLStats:
+	count: int = 0
+	total_s: float = 0.0
+
+
+_request_stats: ContextVar[Optional[SQLStats]] = ContextVar("sql_request_stats", default=None)
+
+
+def begin_request() -> SQLStats:
+	stats = SQLStats()
+	_request_stats.set(stats)
+	return stats
+
+
+def server_timing(stats: SQLStats) -> str:
+	return f'db;dur={stats.total_s * 1000:.2f};desc="{stats.count} queries"'
+
+
+def _explain(conn, statement: str, parameters) -> List[str]:
+	if not statement.lstrip().upper().startswith("SELECT"):
+		return []
+	prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+	# Use a raw DBAPI cursor so the EXPLAIN itself does not re-enter these hooks
+	cursor = conn.connection.cursor()
+	try:
+		cursor.execute(prefix + statement, parameters)
+		return [str(row[-1]) for row in cursor.fetchall()]
+	except Exception as exc:  # the plan is diagnostic only, never fail the request
+		return [f"EXPLAIN failed: {exc}"]
+	finally:
+		cursor.close()
+
+
+def install(engine: Engine) -> None:
+	threshold_s = settings.SLOW_QUERY_MS / 1000.0
+
+	@event.listens_for(engine, "before_cursor_execute")
+	def _before(conn, cursor, statement, parameters, context, executemany):
+		conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+	@event.listens_for(engine, "after_cursor_execute")
+	def _after(conn, cursor, statement, parameters, context, executemany):
+		elapsed = time.perf_counter() - conn.info["query_start"].pop()
+		stats = _request_stats.get()
+		if stats is not None:
+			stats.count += 1
+			stats.total_s += elapsed
+
+		if elapsed >= threshold_s:
+			plan = [] if executemany else _explain(conn, statement, parameters)
+			SLOW_QUERIES.append(
+				{
+					"duration_ms": round(elapsed * 1000, 3),
+					"statement": statement,
+					"parameters": repr(parameters),
+					"plan": plan,
+				}
+			)
+			logger.warning(
+				"Slow query (%.1f ms): %s | params=%r | plan=%s",
+				elapsed * 1000,
+				" ".join(statement.split()),
+				parameters,
+				"; ".join(plan),
+			)
+
+	@event.listens_for(engine, "handle_error")
+	def _failed(context):
+		# A failed statement never reaches _after; drop its start time so pooled connections do not accumulate them
+		conn = context.connection
+		starts = conn.info.get("query_start") if conn is not None else None
+		if starts:
+			starts.pop()
@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+from .config import settings
+from .metrics import registry
+
+RATE_LIMITED = registry.counter("rate_limited_total", "Requests rejected by the per-client rate limiter")
+
+
+class TokenBucketLimiter:
+	"""Per-client token buckets held in process memory.
+
+	Each client may burst up to `burst` requests and is then refilled at
+	`rate` tokens per second. Buckets are tracked in LRU order and the
+	least recently seen clients are dropped beyond `max_clients`; a dropped
+	client simply starts again with a full bucket.
+	"""
+
+	def __init__(self, rate: float, burst: int, max_clients: int) -> None:
+		self.rate = rate
+		self.burst = burst
+		self.max_clients = max_clients
+		# client key -> [tokens, last refill timestamp]
+		self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def acquire(self, key: str) -> float:
+		"""Take one token; returns 0 on success, else seconds until one is available."""
+		now = time.monotonic()
+		with self._lock:
+			bucket = self._buckets.get(key)
+			if bucket is None:
+				bucket = self._buckets[key] = [float(self.burst), now]
+				if len(self._buckets) > self.max_clients:
+					self._buckets.popitem(last=False)
+			else:
+				self._buckets.move_to_end(key)
+				bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+				bucket[1] = now
+			if bucket[0] >= 1.0:
+				bucket[0] -= 1.0
+				return 0.0
+			return (1.0 - bucket[0]) / self.rate
+
+
+limiter = TokenBucketLimiter(settings.RATE_LIMIT_RPS, settings.RATE_LIMIT_BURST, settings.RATE_LIMIT_MAX_CLIENTS)
@@ -0,0 +1,53 @@
+import sys
+from typing import Collection, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Fields a client may request through the `fields=` projection
+MOVIE_FIELDS = ("id", "title", "year", "genres", "overview", "poster_url")
+
+# Projectable fields that map to columns on the movie table
+MOVIE_COLUMNS = ("title", "year", "overview", "poster_url")
+
+# Of those, the ones stored in the cold moviedetail table
+DETAIL_COLUMNS = ("overview", "poster_url")
+
+
+class MovieRecord(NamedTuple):
+	"""Read-only movie row used on the read path instead of ORM instances.
+
+	A NamedTuple is a plain tuple underneath: no per-instance __dict__, no
+	SQLAlchemy instance state, and it is built positionally straight from a
+	Core result row. Genre names are interned so a pool of thousands of
+	movies shares one string object per genre.
+	"""
+
+	id: int
+	title: Optional[str]
+	year: Optional[int]
+	overview: Optional[str]
+	poster_url: Optional[str]
+	genres: Tuple[str, ...]
+
+	def to_dict(self, fields: Optional[Collection[str]] = None) -> dict:
+		if fields is None:
+			return {
+				"id": self.id,
+				"title": self.title,
+				"year": self.year,
+				"genres": self.genres,
+				"overview": self.overview,
+				"poster_url": self.poster_url,
+			}
+		out = {"id": self.id}
+		for name in MOVIE_FIELDS[1:]:
+			if name in fields:
+				out[name] = getattr(self, name)
+		return out
+
+
+def intern_genres(names: Iterable[str]) -> Tuple[str, ...]:
+	return tuple(sys.intern(name) for name in names)
+
+
+def records_from_rows(rows: Sequence[Sequence]) -> List[MovieRecord]:
+	# Rebuild records from JSON arrays, e.g. after a round-trip through a shared cache
+	return [MovieRecord(*row[:5], intern_genres(row[5])) for row in rows]
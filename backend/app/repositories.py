@@ -1,7 +1,18 @@
-from typing import List, Optional
+import heapq
+import random
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, insert, null
 from sqlmodel import Session, select
 
-from .models import Movie, Genre, MovieGenre
+from .db import shards
+from .models import Interaction, Movie, MovieDetail, Genre, MovieGenre
+from .records import DETAIL_COLUMNS, MOVIE_COLUMNS, MovieRecord, intern_genres
+
+# Splits sample sizes across shards
+_rng = np.random.default_rng()
 
 
 class GenreRepository:
@@ -15,26 +26,235 @@ class GenreRepository:
 		statement = select(Genre).where(Genre.name == name)
 		return session.exec(statement).first()
 
+	@staticmethod
+	def names_by_movie(session: Session, movie_ids: Sequence[int]) -> Dict[int, List[str]]:
+		# One query for the whole pool instead of a lazy load per movie
+		names: Dict[int, List[str]] = {movie_id: [] for movie_id in movie_ids}
+		chunk = 900  # stay under SQLite's bound-parameter limit
+		for start in range(0, len(movie_ids), chunk):
+			statement = (
+				select(MovieGenre.movie_id, Genre.name)
+				.join(Genre, Genre.id == MovieGenre.genre_id)
+				.where(MovieGenre.movie_id.in_(movie_ids[start:start + chunk]))
+			)
+			for movie_id, name in session.exec(statement):
+				names[movie_id].append(name)
+		return names
+
+
+# Where each projectable column lives: the narrow hot table or the cold detail table
+_COLUMN_SOURCES = {
+	"title": Movie.title,
+	"year": Movie.year,
+	"overview": MovieDetail.overview,
+	"poster_url": MovieDetail.poster_url,
+}
+
+
+def _needs_detail(columns: Optional[Sequence[str]]) -> bool:
+	return columns is None or any(c in columns for c in DETAIL_COLUMNS)
+
+
+def _record_columns(columns: Optional[Sequence[str]]) -> list:
+	# Unrequested columns become a NULL literal: positions stay fixed, no column I/O
+	return [Movie.id] + [
+		_COLUMN_SOURCES[c] if columns is None or c in columns else null() for c in MOVIE_COLUMNS
+	]
+
+
+def _with_detail(statement, columns: Optional[Sequence[str]]):
+	# Detail rows are fetched by primary key, only for movies that passed the filters
+	if not _needs_detail(columns):
+		return statement
+	return statement.outerjoin(MovieDetail, MovieDetail.movie_id == Movie.id)
+
+
+def _by_genre(statement, genre_name: str, year_min: Optional[int], year_max: Optional[int]):
+	statement = (
+		statement.join(MovieGenre, Movie.id == MovieGenre.movie_id)
+		.join(Genre, Genre.id == MovieGenre.genre_id)
+		.where(Genre.name == genre_name)
+	)
+	if year_min is not None:
+		statement = statement.where(Movie.year >= year_min)
+	if year_max is not None:
+		statement = statement.where(Movie.year <= year_max)
+	return statement
+
+
+def _to_records(session: Session, rows, with_genres: bool) -> List[MovieRecord]:
+	if not with_genres:
+		return [MovieRecord(*row, ()) for row in rows]
+	names = GenreRepository.names_by_movie(session, [row[0] for row in rows])
+	return [MovieRecord(*row, intern_genres(names[row[0]])) for row in rows]
+
 
 class MovieRepository:
 	@staticmethod
-	def list_by_genre(
+	def list_records_by_genre(
 		session: Session,
 		genre_name: str,
 		year_min: Optional[int] = None,
 		year_max: Optional[int] = None,
-	) -> List[Movie]:
-		# Join movies -> movie_genres -> genres filtering by name
-		statement = (
-			select(Movie)
-			.join(MovieGenre, Movie.id == MovieGenre.movie_id)
-			.join(Genre, Genre.id == MovieGenre.genre_id)
-			.where(Genre.name == genre_name)
+		columns: Optional[Sequence[str]] = None,
+		with_genres: bool = True,
+	) -> List[MovieRecord]:
+		# Core row tuples rather than ORM instances: no identity map or per-attribute state
+		statement = _by_genre(select(*_record_columns(columns)).select_from(Movie), genre_name, year_min, year_max)
+		statement = _with_detail(statement, columns)
+
+		parts = shards.scatter(session, lambda _, s: _to_records(s, s.execute(statement).all(), with_genres))
+		return list(chain.from_iterable(parts))
+
+	@staticmethod
+	def sample_records_by_genre(
+		session: Session,
+		genre_name: str,
+		k: int,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+		columns: Optional[Sequence[str]] = None,
+		with_genres: bool = True,
+	) -> List[MovieRecord]:
+		"""A uniform random sample of `k` matching movies, without loading the pool.
+
+		Each shard returns its match count and up to `k` of its matches in
+		random order, in one query: the ids and count come from the hot tables,
+		and only those `k` rows are joined to their details. How many of the `k` come from each shard is
+		then drawn from the multivariate hypergeometric distribution over those
+		counts, which is exactly how a uniform `k`-subset of the global pool
+		splits across shards; taking that many from the front of each shard's
+		random sample keeps the result uniform.
+		"""
+		ids = select(Movie.id, func.count().over().label("matches")).select_from(Movie)
+		picked = (
+			_by_genre(ids, genre_name, year_min, year_max)
+			.order_by(func.random())
+			.limit(k)
+			.subquery()
 		)
+		statement = select(*_record_columns(columns), picked.c.matches).select_from(Movie).join(picked, picked.c.id == Movie.id)
+		statement = _with_detail(statement, columns)
 
+		def sample_shard(_: int, shard_session: Session):
+			rows = shard_session.execute(statement).all()
+			# The join does not keep the subquery's random order
+			random.shuffle(rows)
+			# Genres for up to k rows per shard cost less than a second round trip
+			return (rows[0][-1] if rows else 0), _to_records(shard_session, [row[:-1] for row in rows], with_genres)
+
+		results = shards.scatter(session, sample_shard)
+		counts = np.array([count for count, _ in results], dtype=np.int64)
+		take = _rng.multivariate_hypergeometric(counts, min(k, int(counts.sum())))
+		sampled = list(chain.from_iterable(records[:n] for (_, records), n in zip(results, take)))
+		random.shuffle(sampled)
+		return sampled
+
+	@staticmethod
+	def ids_in_years(session: Session, year_min: Optional[int], year_max: Optional[int]) -> List[int]:
+		statement = select(Movie.id)
 		if year_min is not None:
 			statement = statement.where(Movie.year >= year_min)
 		if year_max is not None:
 			statement = statement.where(Movie.year <= year_max)
+		return list(chain.from_iterable(shards.scatter(session, lambda _, s: s.exec(statement).all())))
 
-		return list(session.exec(statement).all())
+	@staticmethod
+	def existing_ids(session: Session, movie_ids: Sequence[int]) -> Set[int]:
+		wanted = set(movie_ids)
+
+		def fetch(shard: int, shard_session: Session) -> List[int]:
+			ids = wanted if not shards.enabled else [i for i in wanted if shards.shard_of(i) == shard]
+			if not ids:
+				return []
+			return list(shard_session.exec(select(Movie.id).where(Movie.id.in_(ids))).all())
+
+		return set(chain.from_iterable(shards.scatter(session, fetch)))
+
+	@staticmethod
+	def records_by_ids(session: Session, movie_ids: Sequence[int]) -> List[MovieRecord]:
+		def fetch(shard: int, shard_session: Session) -> List[MovieRecord]:
+			ids = movie_ids if not shards.enabled else [i for i in movie_ids if shards.shard_of(i) == shard]
+			if not ids:
+				return []
+			statement = _with_detail(select(*_record_columns(None)).select_from(Movie), None).where(Movie.id.in_(ids))
+			return _to_records(shard_session, shard_session.execute(statement).all(), True)
+
+		by_id = {r.id: r for r in chain.from_iterable(shards.scatter(session, fetch))}
+		# Preserve the caller's (ranked) order
+		return [by_id[i] for i in movie_ids if i in by_id]
+
+	@staticmethod
+	def details_by_ids(session: Session, movie_ids: Sequence[int]) -> Dict[int, Tuple[Optional[str], Optional[str]]]:
+		"""(overview, poster_url) per movie, looked up by primary key."""
+
+		def fetch(shard: int, shard_session: Session):
+			ids = movie_ids if not shards.enabled else [i for i in movie_ids if shards.shard_of(i) == shard]
+			if not ids:
+				return []
+			statement = select(MovieDetail.movie_id, MovieDetail.overview, MovieDetail.poster_url).where(
+				MovieDetail.movie_id.in_(ids)
+			)
+			return shard_session.execute(statement).all()
+
+		rows = chain.from_iterable(shards.scatter(session, fetch))
+		return {movie_id: (overview, poster_url) for movie_id, overview, poster_url in rows}
+
+	@staticmethod
+	def iter_catalog(session: Session, batch_size: int = 1000) -> Iterator[MovieRecord]:
+		"""Every movie with its genre names, ordered by id.
+
+		Genres are aggregated in SQL so each movie is one row, and rows are
+		streamed from a server-side cursor `batch_size` at a time instead of
+		materializing the whole result. Shards are streamed side by side and
+		merged on id.
+		"""
+		if shards.enabled:
+			yield from heapq.merge(
+				*(MovieRepository._iter_shard(shard, batch_size) for shard in range(len(shards))), key=lambda r: r.id
+			)
+			return
+		yield from MovieRepository._iter_session(session, batch_size)
+
+	@staticmethod
+	def _iter_shard(shard: int, batch_size: int) -> Iterator[MovieRecord]:
+		with shards.session(shard) as session:
+			yield from MovieRepository._iter_session(session, batch_size)
+
+	@staticmethod
+	def _iter_session(session: Session, batch_size: int) -> Iterator[MovieRecord]:
+		separator = "\x1f"
+		if session.get_bind().dialect.name == "postgresql":
+			genre_names = func.string_agg(Genre.name, separator)
+		else:
+			genre_names = func.group_concat(Genre.name, separator)
+		statement = (
+			select(Movie.id, Movie.title, Movie.year, MovieDetail.overview, MovieDetail.poster_url, genre_names)
+			.outerjoin(MovieDetail, MovieDetail.movie_id == Movie.id)
+			.outerjoin(MovieGenre, Movie.id == MovieGenre.movie_id)
+			.outerjoin(Genre, Genre.id == MovieGenre.genre_id)
+			# moviedetail's key too, so PostgreSQL accepts its columns alongside the aggregate
+			.group_by(Movie.id, MovieDetail.movie_id)
+			.order_by(Movie.id)
+			.execution_options(yield_per=batch_size)
+		)
+		for row in session.execute(statement):
+			yield MovieRecord(*row[:5], intern_genres(row[5].split(separator)) if row[5] else ())
+
+
+class InteractionRepository:
+	@staticmethod
+	def add_many(session: Session, events: Sequence[dict]) -> int:
+		# Core INSERT with a parameter list runs as a single executemany
+		session.execute(insert(Interaction), list(events))
+		session.commit()
+		return len(events)
+
+	@staticmethod
+	def event_counts(session: Session):
+		# (user_id, movie_id, event, count) rows; weights are applied by the trainer
+		statement = (
+			select(Interaction.user_id, Interaction.movie_id, Interaction.event, func.count())
+			.group_by(Interaction.user_id, Interaction.movie_id, Interaction.event)
+		)
+		return session.exec(statement)
@@ -0,0 +1,85 @@
+import secrets
+import time
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from .. import memprofile
+from ..config import settings
+from ..sampler import ProfilerBusy, collapsed, endpoint_codes, profiler, top_frames
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+	# Without a configured token the admin surface does not exist
+	if not settings.ADMIN_TOKEN:
+		raise HTTPException(status_code=404, detail="Not Found")
+	if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+		raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _tracing_required(exc: memprofile.ProfilingDisabled) -> HTTPException:
+	return HTTPException(status_code=409, detail=str(exc))
+
+
+@router.get("/memory")
+def memory_status() -> dict:
+	return memprofile.status()
+
+
+@router.post("/memory/snapshots")
+def take_memory_snapshot(
+	label: str | None = Query(default=None, description="Name to diff against later (default: timestamp)"),
+	top: int = Query(20, ge=1, le=200),
+) -> dict:
+	try:
+		return memprofile.take_snapshot(label or f"snapshot-{time.time():.0f}", top)
+	except memprofile.ProfilingDisabled as exc:
+		raise _tracing_required(exc)
+
+
+@router.get("/memory/diff")
+def memory_diff(
+	base: str = Query(..., description="Earlier snapshot label"),
+	target: str | None = Query(default=None, description="Later snapshot label (default: now)"),
+	top: int = Query(20, ge=1, le=200),
+) -> dict:
+	try:
+		return memprofile.diff(base, target, top)
+	except memprofile.ProfilingDisabled as exc:
+		raise _tracing_required(exc)
+	except KeyError as exc:
+		raise HTTPException(status_code=404, detail=f"Unknown snapshot: {exc.args[0]}")
+
+
+@router.get("/memory/sizes")
+def memory_sizes() -> dict:
+	return memprofile.size_report()
+
+
+@router.get("/profile")
+def cpu_profile(
+	request: Request,
+	seconds: float = Query(10.0, gt=0, le=settings.PROFILER_MAX_SECONDS),
+	interval_ms: float = Query(10.0, ge=1, le=1000),
+	mode: Literal["wall", "cpu"] = Query("wall", description="cpu drops threads parked in waits"),
+	format: Literal["collapsed", "json"] = Query("collapsed"),
+):
+	# Blocks one threadpool thread for `seconds`; every other thread is sampled
+	try:
+		folded = profiler.run(seconds, interval_ms / 1000.0, endpoint_codes(request.app.routes), mode)
+	except ProfilerBusy:
+		raise HTTPException(status_code=409, detail="A profile is already running")
+	if format == "json":
+		return {
+			"seconds": seconds,
+			"interval_ms": interval_ms,
+			"mode": mode,
+			"samples": sum(folded.values()),
+			"top": top_frames(folded),
+			"collapsed": collapsed(folded),
+		}
+	return PlainTextResponse(collapsed(folded))
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+
+from ..facets import facets_index
+from ..schemas import FacetsResponse
+
+router = APIRouter(prefix="/facets", tags=["facets"])
+
+
+@router.get("", response_model=FacetsResponse)
+def get_facets(
+	genre: str | None = Query(default=None, description="Restrict the year histogram to this genre"),
+	year_min: int | None = Query(default=None),
+	year_max: int | None = Query(default=None),
+) -> ORJSONResponse:
+	# Served entirely from the in-memory index; no database session needed
+	facets = facets_index.get()
+	if genre is not None and genre not in facets.genre_names:
+		raise HTTPException(status_code=400, detail=f"Unknown genre: {genre}")
+
+	# Each facet is filtered by the others: genre counts by the year range,
+	# the year histogram by the genre
+	counts = facets.genre_counts(year_min, year_max)
+	histograms = facets.year_histograms(year_min, year_max)
+	if genre is None:
+		movies = facets.movie_count(year_min, year_max)
+	else:
+		movies = int(counts[facets.genre_names.index(genre)])
+	return ORJSONResponse(
+		{
+			"catalog_year_min": facets.year_min,
+			"catalog_year_max": facets.year_max,
+			"genre": genre,
+			"year_min": year_min,
+			"year_max": year_max,
+			"movies": movies,
+			"years": facets.year_histogram(genre, year_min, year_max),
+			"genres": [
+				{"name": name, "count": int(count), "years": years}
+				for name, count, years in zip(facets.genre_names, counts, histograms)
+			],
+		}
+	)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session
 
-from ..db import engine
+from ..db import read_session
 from ..schemas import GenreListResponse
 from ..services import RecommendationService
 
@@ -9,7 +9,7 @@ router = APIRouter(prefix="/genres", tags=["genres"])
 
 
 def get_session():
-	with Session(engine) as session:
+	with read_session() as session:
 		yield session
 
 
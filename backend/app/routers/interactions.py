@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException
+
+from ..db import read_session
+from ..ingest import QueueFull, event_writer
+from ..repositories import MovieRepository
+from ..schemas import InteractionBatch, InteractionIngestResponse
+
+router = APIRouter(prefix="/interactions", tags=["interactions"])
+
+
+@router.post("", response_model=InteractionIngestResponse, status_code=202)
+def ingest(batch: InteractionBatch) -> InteractionIngestResponse:
+	# Events are written asynchronously in batches; 202 means queued, not yet committed
+	movie_ids = {e.movie_id for e in batch.events}
+	with read_session() as session:
+		unknown = movie_ids - MovieRepository.existing_ids(session, list(movie_ids))
+	if unknown:
+		# All-or-nothing like the queue itself, so the client can fix and resend the batch
+		raise HTTPException(status_code=400, detail=f"Unknown movie ids: {', '.join(map(str, sorted(unknown)))}")
+	try:
+		event_writer.enqueue([e.model_dump() for e in batch.events])
+	except QueueFull:
+		raise HTTPException(status_code=503, detail="Ingest queue is full", headers={"Retry-After": "1"})
+	return InteractionIngestResponse(accepted=len(batch.events))
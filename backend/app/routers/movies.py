@@ -0,0 +1,57 @@
+import csv
+import io
+from typing import Iterator, Literal
+
+import orjson
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from ..db import read_session
+from ..repositories import MovieRepository
+
+router = APIRouter(prefix="/movies", tags=["movies"])
+
+EXPORT_COLUMNS = ("id", "title", "year", "overview", "poster_url", "genres")
+
+# Rows fetched per cursor round-trip, and rows encoded per streamed chunk
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_ndjson() -> Iterator[bytes]:
+	# The session lives inside the generator so it stays open while the body streams
+	with read_session() as session:
+		chunk = []
+		for record in MovieRepository.iter_catalog(session, EXPORT_BATCH_SIZE):
+			chunk.append(orjson.dumps(record.to_dict()))
+			if len(chunk) == EXPORT_BATCH_SIZE:
+				yield b"\n".join(chunk) + b"\n"
+				chunk = []
+		if chunk:
+			yield b"\n".join(chunk) + b"\n"
+
+
+def _export_csv() -> Iterator[bytes]:
+	buffer = io.StringIO()
+	writer = csv.writer(buffer)
+	writer.writerow(EXPORT_COLUMNS)
+	with read_session() as session:
+		for i, record in enumerate(MovieRepository.iter_catalog(session, EXPORT_BATCH_SIZE), 1):
+			writer.writerow((*record[:5], "|".join(record.genres)))
+			if i % EXPORT_BATCH_SIZE == 0:
+				yield buffer.getvalue().encode("utf-8")
+				buffer.seek(0)
+				buffer.truncate()
+	yield buffer.getvalue().encode("utf-8")
+
+
+@router.get("/export")
+def export_movies(
+	format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson (one movie per line) or csv"),
+) -> StreamingResponse:
+	if format == "csv":
+		return StreamingResponse(
+			_export_csv(),
+			media_type="text/csv",
+			headers={"Content-Disposition": 'attachment; filename="movies.csv"'},
+		)
+	return StreamingResponse(_export_ndjson(), media_type="application/x-ndjson")
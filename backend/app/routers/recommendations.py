@@ -1,17 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlmodel import Session
 
+from ..catalog import genre_ids
 from ..config import settings
-from ..db import engine
-from ..schemas import RecommendationsResponse, MovieOut
+from ..db import read_session
+from ..metrics import stage
+from ..schemas import PersonalRecommendationsResponse, RecommendationsResponse
+from ..records import MOVIE_FIELDS
 from ..services import RecommendationService
-from ..repositories import GenreRepository
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
 
 def get_session():
-	with Session(engine) as session:
+	with read_session() as session:
 		yield session
 
 
@@ -21,17 +24,59 @@ def recommend(
 	n: int = Query(settings.DEFAULT_N, ge=1, le=settings.MAX_N),
 	year_min: int | None = Query(default=None),
 	year_max: int | None = Query(default=None),
+	fields: str | None = Query(default=None, description="Comma-separated movie fields to return (id is always included)"),
+	user_id: str | None = Query(default=None, description="Avoid movies already served to this user"),
+	diversify: bool = Query(default=False, description="Re-rank a wider candidate set for genre/year variety"),
 	session: Session = Depends(get_session),
-) -> RecommendationsResponse:
-	genre_obj = GenreRepository.get_by_name(session, genre)
-	if genre_obj is None:
+) -> ORJSONResponse:
+	with stage("genre_lookup"):
+		known = genre in genre_ids.get()
+	if not known:
 		raise HTTPException(status_code=400, detail=f"Unknown genre: {genre}")
 
-	movies_dict = RecommendationService.recommend_by_genre(session, genre, n, year_min, year_max)
-	movies_out = [MovieOut(**m) for m in movies_dict]
-	return RecommendationsResponse(
-		genre=genre,
-		requested=n,
-		returned=len(movies_out),
-		movies=movies_out,
+	selected = None
+	if fields is not None:
+		selected = {f.strip() for f in fields.split(",") if f.strip()}
+		unknown = selected.difference(MOVIE_FIELDS)
+		if unknown:
+			raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+	movies_dict, degraded = RecommendationService.recommend_by_genre(
+		session, genre, n, year_min, year_max, selected, user_id, diversify
+	)
+	# MovieRecord.to_dict already produces the (projected) MovieOut shape, so return
+	# the payload directly instead of validating it twice via response_model.
+	return ORJSONResponse(
+		{
+			"genre": genre,
+			"requested": n,
+			"returned": len(movies_dict),
+			"movies": movies_dict,
+			"degraded": degraded,
+		}
+	)
+
+
+@router.get("/personal", response_model=PersonalRecommendationsResponse)
+def recommend_personal(
+	user_id: str = Query(..., min_length=1, description="User to personalize for"),
+	n: int = Query(settings.DEFAULT_N, ge=1, le=settings.MAX_N),
+	genre: str | None = Query(default=None, description="Restrict to a genre; also the cold-start fallback"),
+	year_min: int | None = Query(default=None),
+	year_max: int | None = Query(default=None),
+	session: Session = Depends(get_session),
+) -> ORJSONResponse:
+	if genre is not None and genre not in genre_ids.get():
+		raise HTTPException(status_code=400, detail=f"Unknown genre: {genre}")
+
+	movies, personalized = RecommendationService.recommend_personal(session, user_id, n, genre, year_min, year_max)
+	return ORJSONResponse(
+		{
+			"user_id": user_id,
+			"genre": genre,
+			"personalized": personalized,
+			"requested": n,
+			"returned": len(movies),
+			"movies": movies,
+		}
 	)
@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .metrics import registry
+
+PROFILER_SAMPLES = registry.counter("profiler_samples_total", "Thread stacks captured by the sampling profiler")
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Leaf frames of threads that are parked rather than running; dropped in "cpu" mode
+_IDLE_LEAVES = {
+	("threading.py", "wait"),
+	("threading.py", "_wait_for_tstate_lock"),
+	("queue.py", "get"),
+	("selectors.py", "select"),
+	("_base.py", "wait"),
+	("thread.py", "_worker"),
+}
+
+
+class ProfilerBusy(Exception):
+	pass
+
+
+def _frame_label(code: CodeType) -> str:
+	path = code.co_filename
+	if path.startswith(_BACKEND_ROOT):
+		path = "backend" + path[len(_BACKEND_ROOT):]
+	elif "site-packages" in path:
+		path = path.split("site-packages", 1)[1].lstrip(os.sep)
+	else:
+		path = os.path.basename(path)
+	# ';' separates frames in the collapsed format
+	return f"{path}:{code.co_qualname}".replace(";", ",")
+
+
+def _stack(frame: Optional[FrameType], route_codes: Dict[CodeType, str]) -> Tuple[str, List[CodeType]]:
+	codes: List[CodeType] = []
+	route = "-"
+	while frame is not None:
+		code = frame.f_code
+		codes.append(code)
+		# The innermost endpoint frame names the route this thread is serving
+		if route == "-" and code in route_codes:
+			route = route_codes[code]
+		frame = frame.f_back
+	codes.reverse()
+	return route, codes
+
+
+def _is_idle(codes: List[CodeType]) -> bool:
+	leaf = codes[-1]
+	return (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES
+
+
+class SamplingProfiler:
+	"""Periodic wall-clock stack sampling of every thread in this worker.
+
+	`sys._current_frames()` is read every `interval_s`; each thread's stack
+	is folded into a "route;frame;frame..." key. Stacks are tagged with the
+	route whose endpoint function appears in them, so the hot frames under
+	e.g. `/recommendations` group together in a flamegraph. Only one profile
+	runs at a time; the caller's own thread is never sampled.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+
+	def run(
+		self,
+		seconds: float,
+		interval_s: float,
+		route_codes: Dict[CodeType, str],
+		mode: str = "wall",
+	) -> Counter:
+		if not self._lock.acquire(blocking=False):
+			raise ProfilerBusy()
+		try:
+			return self._sample(seconds, interval_s, route_codes, mode)
+		finally:
+			self._lock.release()
+
+	def _sample(self, seconds: float, interval_s: float, route_codes: Dict[CodeType, str], mode: str) -> Counter:
+		me = threading.get_ident()
+		labels: Dict[CodeType, str] = {}
+		folded: Counter = Counter()
+		deadline = time.monotonic() + seconds
+		next_tick = time.monotonic()
+		while next_tick < deadline:
+			for ident, frame in sys._current_frames().items():
+				if ident == me:
+					continue
+				route, codes = _stack(frame, route_codes)
+				if not codes or (mode == "cpu" and _is_idle(codes)):
+					continue
+				names = [labels.get(c) or labels.setdefault(c, _frame_label(c)) for c in codes]
+				folded[route + ";" + ";".join(names)] += 1
+			PROFILER_SAMPLES.inc()
+			next_tick += interval_s
+			time.sleep(max(0.0, next_tick - time.monotonic()))
+		return folded
+
+
+def endpoint_codes(routes: Iterable) -> Dict[CodeType, str]:
+	"""Map each route's endpoint function code object to its path template."""
+	codes = {}
+	for route in routes:
+		endpoint = getattr(route, "endpoint", None)
+		code = getattr(endpoint, "__code__", None)
+		if code is not None:
+			codes[code] = route.path
+	return codes
+
+
+def collapsed(folded: Counter) -> str:
+	# Brendan Gregg's folded format, accepted by flamegraph.pl and speedscope
+	return "".join(f"{stack} {count}\n" for stack, count in folded.most_common())
+
+
+def top_frames(folded: Counter, limit: int = 30) -> List[dict]:
+	self_counts: Counter = Counter()
+	total_counts: Counter = Counter()
+	for stack, count in folded.items():
+		frames = stack.split(";")[1:]
+		self_counts[frames[-1]] += count
+		for frame in set(frames):
+			total_counts[frame] += count
+	return [
+		{"frame": frame, "total": total, "self": self_counts.get(frame, 0)}
+		for frame, total in total_counts.most_common(limit)
+	]
+
+
+profiler = SamplingProfiler()
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -12,8 +12,9 @@ class GenreListResponse(BaseModel):
 
 
 class MovieOut(BaseModel):
+	# Only id is always present: fields= leaves out everything that was not requested
 	id: int
-	title: str
+	title: Optional[str] = None
 	year: Optional[int] = None
 	genres: List[str] = Field(default_factory=list)
 	overview: Optional[str] = None
@@ -25,3 +26,50 @@ class RecommendationsResponse(BaseModel):
 	requested: int
 	returned: int
 	movies: List[MovieOut]
+	# True when the DB time budget ran out and a fallback pool was served
+	degraded: bool = False
+
+
+class InteractionIn(BaseModel):
+	user_id: str = Field(min_length=1)
+	movie_id: int
+	event: Literal["click", "like", "watch"]
+
+
+class InteractionBatch(BaseModel):
+	events: List[InteractionIn] = Field(min_length=1, max_length=1000)
+
+
+class InteractionIngestResponse(BaseModel):
+	accepted: int
+
+
+class PersonalRecommendationsResponse(BaseModel):
+	user_id: str
+	genre: Optional[str] = None
+	personalized: bool
+	requested: int
+	returned: int
+	movies: List[MovieOut]
+
+
+class YearCount(BaseModel):
+	year: int
+	count: int
+
+
+class GenreFacet(BaseModel):
+	name: str
+	count: int
+	years: List[YearCount]
+
+
+class FacetsResponse(BaseModel):
+	catalog_year_min: Optional[int] = None
+	catalog_year_max: Optional[int] = None
+	genre: Optional[str] = None
+	year_min: Optional[int] = None
+	year_max: Optional[int] = None
+	movies: int
+	years: List[YearCount]
+	genres: List[GenreFacet]
@@ -1,29 +1,209 @@
 import random
-from typing import List, Optional
+from typing import Collection, Container, Dict, Iterator, List, Optional, Tuple
 from sqlmodel import Session
 
+from .budget import BudgetExceeded, time_budget
+from .cache import cache
+from .catalog import genre_ids, register_index
 from .config import settings
-from .models import Movie
+from .db import shards
+from .diversity import mmr_select
+from .history import history
+from .memprofile import track
+from .metrics import POOL_SIZE, stage
+from .personalization import get_model
+from .records import DETAIL_COLUMNS, MOVIE_COLUMNS, MovieRecord, records_from_rows
 from .repositories import GenreRepository, MovieRepository
+from .singleflight import SingleFlight
 
+# Concurrent misses for the same pool share one DB query
+_pool_flight = SingleFlight("pool")
 
-def movie_to_dict(session: Session, movie: Movie) -> dict:
-	# Fetch genres via relationship (already lazy-loaded by SQLModel when accessed)
-	genre_names = [g.name for g in movie.genres]
-	return {
-		"id": movie.id,
-		"title": movie.title,
-		"year": movie.year,
-		"genres": genre_names,
-		"overview": movie.overview,
-		"poster_url": movie.poster_url,
-	}
+# Last unfiltered pool loaded per (genre, projection), served when a later load runs out of time budget
+_last_pools: Dict[Tuple[str, str], List[MovieRecord]] = {}
+# Catalog version those pools were loaded from; older pools may hold movies that no longer exist
+_last_pools_version: Optional[int] = None
+track("last_pools", lambda: _last_pools)
+
+
+def _remember_pool(key: Tuple[str, str], pool: List[MovieRecord]) -> None:
+	global _last_pools_version
+	if _last_pools_version != cache.catalog_version:
+		_last_pools.clear()
+		_last_pools_version = cache.catalog_version
+	_last_pools[key] = pool
+
+
+def _recall_pool(key: Tuple[str, str]) -> Optional[List[MovieRecord]]:
+	return _last_pools.get(key) if _last_pools_version == cache.catalog_version else None
+
+
+def _projection(fields: Optional[Collection[str]]) -> str:
+	# Detail fields are not part of a pool, so they do not split its cache entry
+	return "*" if fields is None else ",".join(sorted(f for f in fields if f not in DETAIL_COLUMNS))
+
+
+def _hot_columns(fields: Optional[Collection[str]]) -> List[str]:
+	# Pools and shard samples read the hot table only; details are added for the movies served
+	return [c for c in MOVIE_COLUMNS if c not in DETAIL_COLUMNS and (fields is None or c in fields)]
+
+
+def _lazy_permutation(n: int) -> Iterator[int]:
+	# Fisher-Yates that only materializes the swaps it has made: O(k) for k draws
+	swaps: Dict[int, int] = {}
+	for i in range(n):
+		j = random.randrange(i, n)
+		yield swaps.get(j, j)
+		swaps[j] = swaps.get(i, i)
+
+
+def sample_unseen(
+	pool: List[MovieRecord], k: int, seen: Container[int], fill: Optional[int] = None
+) -> List[MovieRecord]:
+	# Prefer movies the user has not been served; top up with seen ones to `fill` (default k) if the pool runs dry
+	fill = k if fill is None else fill
+	fresh: List[MovieRecord] = []
+	repeats: List[MovieRecord] = []
+	for idx in _lazy_permutation(len(pool)):
+		movie = pool[idx]
+		if movie.id not in seen:
+			fresh.append(movie)
+			if len(fresh) == k:
+				return fresh
+		elif len(repeats) < fill:
+			repeats.append(movie)
+	return fresh + repeats[: max(0, fill - len(fresh))]
+
+
+def _build_fallback_pools(session: Session) -> Dict[str, List[MovieRecord]]:
+	# Up to FALLBACK_POOL_SIZE movies per genre, built off the request path on catalog changes
+	size = settings.FALLBACK_POOL_SIZE
+	pools: Dict[str, List[MovieRecord]] = {name: [] for name in GenreRepository.list_genre_names(session)}
+	open_genres = len(pools)
+	for record in MovieRepository.iter_catalog(session):
+		for name in record.genres:
+			pool = pools.get(name)
+			if pool is not None and len(pool) < size:
+				pool.append(record)
+				if len(pool) == size:
+					open_genres -= 1
+		if open_genres <= 0:
+			break
+	return pools
+
+
+# Only needed, and only worth a catalog scan per version, when pool loads can run out of budget
+fallback_pools = register_index("fallback_pools", _build_fallback_pools) if settings.DB_TIME_BUDGET_MS > 0 else None
+
+
+def _in_years(pool: List[MovieRecord], year_min: Optional[int], year_max: Optional[int]) -> List[MovieRecord]:
+	if year_min is None and year_max is None:
+		return pool
+	return [
+		m
+		for m in pool
+		if m.year is not None
+		and (year_min is None or m.year >= year_min)
+		and (year_max is None or m.year <= year_max)
+	]
 
 
 class RecommendationService:
 	@staticmethod
 	def get_genres(session: Session) -> List[str]:
-		return GenreRepository.list_genre_names(session)
+		return cache.get_or_set("genres", "all", lambda: GenreRepository.list_genre_names(session))
+
+	@staticmethod
+	def load_pool(
+		session: Session,
+		genre_name: str,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+		fields: Optional[Collection[str]] = None,
+	) -> List[MovieRecord]:
+		columns = _hot_columns(fields)
+		with_genres = fields is None or "genres" in fields
+		with time_budget():
+			pool = MovieRepository.list_records_by_genre(session, genre_name, year_min, year_max, columns, with_genres)
+		if year_min is None and year_max is None:
+			# Filtered pools would hide the genre's other years from a later fallback
+			_remember_pool((genre_name, _projection(fields)), pool)
+		return pool
+
+	@staticmethod
+	def sample_shards(
+		session: Session,
+		genre_name: str,
+		k: int,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+		fields: Optional[Collection[str]] = None,
+	) -> List[MovieRecord]:
+		columns = _hot_columns(fields)
+		with_genres = fields is None or "genres" in fields
+		with time_budget():
+			return MovieRepository.sample_records_by_genre(
+				session, genre_name, k, year_min, year_max, columns, with_genres
+			)
+
+	@staticmethod
+	def with_details(
+		session: Session, records: List[MovieRecord], fields: Optional[Collection[str]] = None
+	) -> List[MovieRecord]:
+		"""Fill overview/poster_url of the movies about to be served, if the response includes them."""
+		if not records or (fields is not None and not any(c in fields for c in DETAIL_COLUMNS)):
+			return records
+		details = MovieRepository.details_by_ids(session, [m.id for m in records])
+		filled = []
+		for m in records:
+			overview, poster_url = details.get(m.id, (None, None))
+			filled.append(m._replace(overview=overview, poster_url=poster_url))
+		return filled
+
+	@staticmethod
+	def fallback_pool(
+		genre_name: str,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+		fields: Optional[Collection[str]] = None,
+	) -> List[MovieRecord]:
+		"""Pool served without touching the DB.
+
+		The genre's last loaded pool with the same projection, else its last
+		full pool (both only from the catalog version being served), else the
+		precomputed one. A projected pool without `year`
+		cannot be year-filtered and is skipped when years are requested.
+		"""
+		by_year = year_min is not None or year_max is not None
+		candidates = [_recall_pool((genre_name, "*"))]
+		if fields is not None and (not by_year or "year" in fields):
+			candidates.insert(0, _recall_pool((genre_name, _projection(fields))))
+		if fallback_pools is not None:
+			candidates.append(fallback_pools.get().get(genre_name))
+		for pool in candidates:
+			pool = _in_years(pool or [], year_min, year_max)
+			if pool:
+				return pool
+		return []
+
+	@staticmethod
+	def get_pool(
+		session: Session,
+		genre_name: str,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+		fields: Optional[Collection[str]] = None,
+	) -> List[MovieRecord]:
+		# Pools are cached whole, so a hit costs no SQL at all
+		key = f"{genre_name}|{year_min}|{year_max}|{_projection(fields)}"
+		return cache.get_or_set(
+			"pool",
+			key,
+			lambda: _pool_flight.do(
+				key, lambda: RecommendationService.load_pool(session, genre_name, year_min, year_max, fields)
+			),
+			decode=records_from_rows,
+		)
 
 	@staticmethod
 	def recommend_by_genre(
@@ -32,14 +212,118 @@ class RecommendationService:
 		n: Optional[int] = None,
 		year_min: Optional[int] = None,
 		year_max: Optional[int] = None,
-	) -> List[dict]:
+		fields: Optional[Collection[str]] = None,
+		user_id: Optional[str] = None,
+		diversify: bool = False,
+	) -> Tuple[List[dict], bool]:
+		"""Sampled movies and whether they came from a fallback pool (`degraded`)."""
+		requested_n = n if n is not None else settings.DEFAULT_N
+		requested_n = max(1, min(settings.MAX_N, requested_n))
+
+		pool_fields = fields
+		if diversify and fields is not None:
+			# Re-ranking needs genres and year even when the client did not ask for them
+			pool_fields = set(fields) | {"genres", "year"}
+
+		# Diversify draws a wider candidate block, then keeps the requested_n most mutually different
+		k = max(requested_n, settings.DIVERSIFY_CANDIDATES) if diversify else requested_n
+
+		degraded = False
+		if shards.enabled and user_id is None:
+			# Only the sampled rows leave the shards; no pool is loaded or cached
+			with stage("shard_sample"):
+				try:
+					sampled = RecommendationService.sample_shards(session, genre_name, k, year_min, year_max, pool_fields)
+				except BudgetExceeded:
+					pool = RecommendationService.fallback_pool(genre_name, year_min, year_max, pool_fields)
+					sampled = random.sample(pool, min(k, len(pool)))
+					degraded = True
+		else:
+			with stage("pool_fetch"):
+				try:
+					pool = RecommendationService.get_pool(session, genre_name, year_min, year_max, pool_fields)
+				except BudgetExceeded:
+					pool = RecommendationService.fallback_pool(genre_name, year_min, year_max, pool_fields)
+					degraded = True
+			POOL_SIZE.observe(len(pool))
+
+			with stage("sampling"):
+				k = min(k, len(pool))
+				seen = history.get(user_id) if user_id is not None else None
+				if seen is None:
+					sampled = random.sample(pool, k)
+				else:
+					# Repeats only make up what fresh movies cannot, so re-ranking never prefers one
+					sampled = sample_unseen(pool, k, seen, fill=min(requested_n, k))
+		if not sampled:
+			return [], degraded
+		if diversify:
+			with stage("diversify"):
+				sampled = mmr_select(
+					sampled, requested_n, settings.DIVERSIFY_LAMBDA, settings.DIVERSIFY_YEAR_SCALE
+				)
+		if user_id is not None:
+			history.record(user_id, (m.id for m in sampled))
+		with stage("details"):
+			try:
+				with time_budget():
+					sampled = RecommendationService.with_details(session, sampled, fields)
+			except BudgetExceeded:
+				# Serve the sampled movies without their cold columns
+				degraded = True
+		with stage("serialization"):
+			return [m.to_dict(fields) for m in sampled], degraded
+
+	@staticmethod
+	def recommend_personal(
+		session: Session,
+		user_id: str,
+		n: Optional[int] = None,
+		genre_name: Optional[str] = None,
+		year_min: Optional[int] = None,
+		year_max: Optional[int] = None,
+	) -> Tuple[List[dict], bool]:
+		"""Top-n movies by factor score; `personalized` is False for cold users."""
 		requested_n = n if n is not None else settings.DEFAULT_N
 		requested_n = max(1, min(settings.MAX_N, requested_n))
+		by_year = year_min is not None or year_max is not None
+		if genre_name is not None and genre_name not in genre_ids.get():
+			# Never fall back to unfiltered results for a genre the catalog does not have
+			return [], False
+
+		model = get_model()
+		if model is None or not model.knows(user_id):
+			if genre_name is not None:
+				movies, _ = RecommendationService.recommend_by_genre(session, genre_name, requested_n, year_min, year_max)
+				return movies, False
+			if model is None:
+				return [], False
+			if not by_year:
+				return RecommendationService._movies_by_ids(session, model.popular_ids(requested_n)), False
+			# Walk the whole popularity ranking: the top few may all fall outside the years
+			popular = MovieRepository.records_by_ids(session, model.popular_ids(len(model.popular)))
+			return [m.to_dict() for m in _in_years(popular, year_min, year_max)[:requested_n]], False
 
-		pool = MovieRepository.list_by_genre(session, genre_name, year_min, year_max)
-		if not pool:
-			return []
+		if model.ann is not None:
+			# Filtered ANN search scales to catalogs too large to score exhaustively
+			genre_id = genre_ids.get().get(genre_name) if genre_name is not None else None
+			with stage("scoring"):
+				ranked = model.recommend_ann(user_id, requested_n, genre_id, year_min, year_max)
+			return RecommendationService._movies_by_ids(session, ranked), True
 
-		k = min(requested_n, len(pool))
-		sampled = random.sample(pool, k)
-		return [movie_to_dict(session, m) for m in sampled]
+		if genre_name is None:
+			candidates = MovieRepository.ids_in_years(session, year_min, year_max) if by_year else None
+			with stage("scoring"):
+				ranked = model.recommend(user_id, requested_n, candidates)
+			return RecommendationService._movies_by_ids(session, ranked), True
+
+		with stage("pool_fetch"):
+			pool = RecommendationService.get_pool(session, genre_name, year_min, year_max)
+		by_id = {m.id: m for m in pool}
+		with stage("scoring"):
+			ranked = model.recommend(user_id, requested_n, list(by_id))
+		return [m.to_dict() for m in RecommendationService.with_details(session, [by_id[i] for i in ranked])], True
+
+	@staticmethod
+	def _movies_by_ids(session: Session, movie_ids: List[int]) -> List[dict]:
+		return [m.to_dict() for m in MovieRepository.records_by_ids(session, movie_ids)]
@@ -0,0 +1,52 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import registry
+
+COALESCED = registry.counter("singleflight_coalesced_total", "Calls that waited on an identical in-flight call")
+
+
+class _Call:
+	def __init__(self) -> None:
+		self.done = threading.Event()
+		self.value: Any = None
+		self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+	"""Collapses concurrent calls with the same key into one execution.
+
+	The first caller for a key runs `fn`; callers arriving while it is in
+	flight block and receive the same result (or exception). Nothing is
+	remembered once the call finishes, so this complements the cache: it
+	only removes the stampede of identical misses before the first `set`.
+	"""
+
+	def __init__(self, name: str) -> None:
+		self.name = name
+		self._calls: Dict[str, _Call] = {}
+		self._lock = threading.Lock()
+
+	def do(self, key: str, fn: Callable[[], Any]) -> Any:
+		with self._lock:
+			call = self._calls.get(key)
+			leader = call is None
+			if leader:
+				call = self._calls[key] = _Call()
+		if not leader:
+			COALESCED.inc(flight=self.name)
+			call.done.wait()
+			if call.error is not None:
+				raise call.error
+			return call.value
+
+		try:
+			call.value = fn()
+			return call.value
+		except BaseException as exc:
+			call.error = exc
+			raise
+		finally:
+			with self._lock:
+				del self._calls[key]
+			call.done.set()
@@ -0,0 +1,202 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# Add the repository root to the path so we can import from backend
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
+
+from backend.app.catalog import genre_ids
+from backend.app.config import settings
+from backend.app.db import shards, snapshots
+from backend.app.records import MOVIE_FIELDS
+from backend.app.services import RecommendationService
+
+Pair = Tuple[str, Optional[str]]
+
+# Per-connection SQLite mmap window; workers reading the same file share these pages
+SQLITE_MMAP_BYTES = 1 << 30
+
+# Set once per worker process by _init_worker
+_engine: Optional[Engine] = None
+_job: dict = {}
+
+
+def read_only_engine(url: str) -> Engine:
+	"""Engine that cannot write; SQLite files are opened read-only and memory-mapped."""
+	if not url.startswith("sqlite:///"):
+		return create_engine(url)
+	path = Path(url[len("sqlite:///"):]).resolve()
+	ro_engine = create_engine(
+		f"sqlite:///file:{path.as_posix()}?mode=ro&uri=true",
+		connect_args={"check_same_thread": False},
+	)
+
+	@event.listens_for(ro_engine, "connect")
+	def _enable_mmap(dbapi_conn, _record):
+		dbapi_conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+
+	return ro_engine
+
+
+def read_pairs(path: Path) -> Iterator[Pair]:
+	"""(user_id, genre) pairs from CSV with a header or NDJSON; an empty genre means none."""
+	with path.open(encoding="utf-8", newline="") as fh:
+		if path.suffix in (".ndjson", ".jsonl"):
+			for line in fh:
+				if line.strip():
+					row = json.loads(line)
+					yield str(row["user_id"]), row.get("genre") or None
+		else:
+			for row in csv.DictReader(fh):
+				yield row["user_id"], row.get("genre") or None
+
+
+def chunked(pairs: Iterator[Pair], size: int) -> Iterator[List[Pair]]:
+	chunk: List[Pair] = []
+	for pair in pairs:
+		chunk.append(pair)
+		if len(chunk) == size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+
+def _init_worker(database_url: str, output_dir: str, fmt: str, n: int, fields: List[str]) -> None:
+	global _engine, _job
+	_engine = read_only_engine(database_url)
+	# Indexes such as genre_ids read through catalog_session(); keep them on this engine too
+	snapshots.pin(_engine)
+	if shards.enabled:
+		shards.replace_engines([read_only_engine(url) for url in settings.CATALOG_SHARD_URLS])
+	_job = {"output_dir": Path(output_dir), "format": fmt, "n": n, "fields": fields}
+
+
+def _write_part(path: Path, rows: List[dict], fmt: str) -> None:
+	tmp = path.with_name(path.name + ".tmp")
+	if fmt == "parquet":
+		import pyarrow as pa
+		import pyarrow.parquet as pq
+
+		pq.write_table(pa.Table.from_pylist(rows), tmp)
+	else:
+		with tmp.open("wb") as fh:
+			for row in rows:
+				fh.write(orjson.dumps(row) + b"\n")
+	# Readers never see half-written parts
+	tmp.replace(path)
+
+
+def _run_chunk(index: int, pairs: List[Pair]) -> Tuple[int, int, float]:
+	"""Recommend for one chunk and write it as one part file; returns (pid, pairs, cpu seconds)."""
+	cpu_start = time.process_time()
+	fields = _job["fields"]
+	known = genre_ids.get()
+	rows = []
+	with Session(_engine) as session:
+		for user_id, genre in pairs:
+			if genre is not None and genre not in known:
+				# Same check the API makes; the row records why it has no movies
+				rows.append(
+					{
+						"user_id": user_id,
+						"genre": genre,
+						"personalized": False,
+						"movies": [],
+						"error": f"Unknown genre: {genre}",
+					}
+				)
+				continue
+			movies, personalized = RecommendationService.recommend_personal(session, user_id, _job["n"], genre)
+			rows.append(
+				{
+					"user_id": user_id,
+					"genre": genre,
+					"personalized": personalized,
+					"movies": [{f: m.get(f) for f in fields} for m in movies],
+					"error": None,
+				}
+			)
+	suffix = "parquet" if _job["format"] == "parquet" else "ndjson"
+	_write_part(_job["output_dir"] / f"part-{index:05d}.{suffix}", rows, _job["format"])
+	return os.getpid(), len(pairs), time.process_time() - cpu_start
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Precompute recommendations for (user, genre) pairs")
+	parser.add_argument("--input", type=Path, required=True, help="CSV (user_id,genre header) or .ndjson file")
+	parser.add_argument("--output-dir", type=Path, default=Path("batch_recommendations"))
+	parser.add_argument("--format", choices=("ndjson", "parquet"), default="ndjson")
+	parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+	parser.add_argument("--chunk-size", type=int, default=5000, help="Pairs per task and per output file")
+	parser.add_argument("--n", type=int, default=settings.DEFAULT_N)
+	parser.add_argument("--fields", default="id,title", help="Movie fields to keep per recommendation")
+	args = parser.parse_args()
+
+	fields = ["id"] + [f for f in (s.strip() for s in args.fields.split(",")) if f and f != "id"]
+	unknown = set(fields).difference(MOVIE_FIELDS)
+	if unknown:
+		parser.error(f"Unknown fields: {', '.join(sorted(unknown))}")
+	if args.format == "parquet":
+		try:
+			import pyarrow  # noqa: F401
+		except ImportError:
+			parser.error("--format parquet requires the 'pyarrow' package")
+	args.output_dir.mkdir(parents=True, exist_ok=True)
+
+	per_worker = defaultdict(lambda: [0, 0.0])
+	total = 0
+	start = time.perf_counter()
+	with ProcessPoolExecutor(
+		max_workers=args.workers,
+		initializer=_init_worker,
+		# Resolved once, so every worker reads the same catalog snapshot for the whole job
+		initargs=(snapshots.url(), str(args.output_dir), args.format, args.n, fields),
+	) as pool:
+		# Keep a bounded number of chunks in flight so the input is streamed, not loaded whole
+		pending = set()
+		for index, chunk in enumerate(chunked(read_pairs(args.input), args.chunk_size)):
+			pending.add(pool.submit(_run_chunk, index, chunk))
+			if len(pending) >= 2 * args.workers:
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					pid, count, cpu_s = future.result()
+					per_worker[pid][0] += count
+					per_worker[pid][1] += cpu_s
+					total += count
+		for future in pending:
+			pid, count, cpu_s = future.result()
+			per_worker[pid][0] += count
+			per_worker[pid][1] += cpu_s
+			total += count
+	elapsed = time.perf_counter() - start
+
+	report = {
+		"pairs": total,
+		"workers": args.workers,
+		"elapsed_s": round(elapsed, 2),
+		"pairs_per_s": round(total / elapsed, 1) if elapsed else None,
+		"pairs_per_s_per_core": round(total / elapsed / args.workers, 1) if elapsed else None,
+		"per_worker": [
+			{"pid": pid, "pairs": count, "cpu_s": round(cpu_s, 2), "pairs_per_cpu_s": round(count / cpu_s, 1) if cpu_s else None}
+			for pid, (count, cpu_s) in sorted(per_worker.items())
+		],
+		"output_dir": str(args.output_dir),
+	}
+	print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+	main()
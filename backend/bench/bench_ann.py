@@ -0,0 +1,100 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the path so we can import from backend
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from backend.app.ann import IVFIndex, encode_genres
+from backend.bench.run_bench import git_revision, percentile
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+	# Clustered data resembles trained factors far better than isotropic noise
+	centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+	labels = rng.integers(0, clusters, n)
+	return centers[labels] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def measure(index: IVFIndex, queries: np.ndarray, k: int, nprobe: int, filters: dict) -> dict:
+	exact_ms, ann_ms, recalls = [], [], []
+	for q in queries:
+		start = time.perf_counter()
+		truth, _ = index.exact_search(q, k, **filters)
+		exact_ms.append((time.perf_counter() - start) * 1000)
+		start = time.perf_counter()
+		got, _ = index.search(q, k, nprobe=nprobe, **filters)
+		ann_ms.append((time.perf_counter() - start) * 1000)
+		if truth.size:
+			recalls.append(len(np.intersect1d(truth, got)) / truth.size)
+	exact_ms.sort()
+	ann_ms.sort()
+	return {
+		"nprobe": nprobe,
+		"recall_at_k": round(float(np.mean(recalls)), 4) if recalls else None,
+		"ann_p50_ms": round(percentile(ann_ms, 50), 3),
+		"ann_p99_ms": round(percentile(ann_ms, 99), 3),
+		"exact_p50_ms": round(percentile(exact_ms, 50), 3),
+		"exact_p99_ms": round(percentile(exact_ms, 99), 3),
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Recall/latency of the IVF index against exact search")
+	parser.add_argument("--items", type=int, default=200000)
+	parser.add_argument("--dim", type=int, default=32)
+	parser.add_argument("--lists", type=int, default=0, help="Defaults to ~sqrt(items)")
+	parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+	parser.add_argument("--queries", type=int, default=200)
+	parser.add_argument("--k", type=int, default=20)
+	parser.add_argument("--genres", type=int, default=14)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--output", type=Path, default=Path("bench_ann_results.json"))
+	args = parser.parse_args()
+
+	rng = np.random.default_rng(args.seed)
+	vectors = synthetic_vectors(args.items, args.dim, max(16, args.items // 2000), rng)
+	years = rng.integers(1950, 2026, args.items).astype(np.int32)
+	genre_lists = [rng.choice(args.genres, rng.integers(1, 4), replace=False) for _ in range(args.items)]
+	genre_bits = encode_genres(genre_lists, args.genres - 1)
+	n_lists = args.lists or int(np.sqrt(args.items))
+
+	start = time.perf_counter()
+	index = IVFIndex.build(vectors, years, genre_bits, n_lists, seed=args.seed)
+	build_s = time.perf_counter() - start
+
+	queries = vectors[rng.choice(args.items, args.queries, replace=False)]
+	scenarios = {
+		"unfiltered": {},
+		"genre": {"genre_id": 0},
+		"genre_year": {"genre_id": 3, "year_min": 1990, "year_max": 2000},
+	}
+	results = {
+		name: [measure(index, queries, args.k, nprobe, filters) for nprobe in args.nprobe]
+		for name, filters in scenarios.items()
+	}
+
+	report = {
+		"git_revision": git_revision(),
+		"config": {
+			"items": args.items,
+			"dim": args.dim,
+			"lists": n_lists,
+			"queries": args.queries,
+			"k": args.k,
+			"genres": args.genres,
+			"seed": args.seed,
+		},
+		"build_s": round(build_s, 3),
+		"results": results,
+	}
+	args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+	print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+	main()
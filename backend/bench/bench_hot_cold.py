@@ -0,0 +1,218 @@
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+# Add the repository root to the path so we can import from backend
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from sqlmodel import SQLModel, create_engine
+
+from backend.app import models  # noqa: F401  (registers the current schema)
+from backend.bench.run_bench import GENRES, git_revision
+
+# The movie table as it was before the hot/cold split
+WIDE_SCHEMA = """
+CREATE TABLE genre (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE);
+CREATE TABLE movie (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, year INTEGER, overview VARCHAR, poster_url VARCHAR);
+CREATE INDEX ix_movie_title ON movie (title);
+CREATE INDEX ix_movie_year ON movie (year);
+CREATE TABLE moviegenre (movie_id INTEGER, genre_id INTEGER, PRIMARY KEY (movie_id, genre_id));
+CREATE INDEX ix_moviegenre_movie_id ON moviegenre (movie_id);
+CREATE INDEX ix_moviegenre_genre_id ON moviegenre (genre_id);
+"""
+
+_JOIN = "JOIN moviegenre mg ON m.id = mg.movie_id JOIN genre g ON g.id = mg.genre_id"
+_WHERE = "WHERE g.name = ? AND m.year BETWEEN ? AND ?"
+
+# Movies a default request serves out of its pool
+SERVED = 10
+
+# (name, wide SQL, split SQL or statements run in turn); both shapes return the same rows
+QUERIES = [
+	(
+		"genre_year_pool_hot_fields",
+		f"SELECT m.id, m.title, m.year FROM movie m {_JOIN} {_WHERE}",
+		f"SELECT m.id, m.title, m.year FROM movie m {_JOIN} {_WHERE}",
+	),
+	(
+		"year_range_scan",
+		"SELECT count(*), sum(length(title)) FROM movie WHERE year BETWEEN ? AND ?",
+		"SELECT count(*), sum(length(title)) FROM movie WHERE year BETWEEN ? AND ?",
+	),
+	(
+		"genre_year_pool_all_fields",
+		f"SELECT m.id, m.title, m.year, m.overview, m.poster_url FROM movie m {_JOIN} {_WHERE}",
+		# Same join order as MovieRepository: details are looked up after the genre/year filter
+		f"SELECT m.id, m.title, m.year, d.overview, d.poster_url FROM movie m {_JOIN} "
+		f"LEFT OUTER JOIN moviedetail d ON d.movie_id = m.id {_WHERE}",
+	),
+	(
+		# What a request without fields= reads: the wide pool carries every overview, the
+		# split one stays on the hot table and looks up details only for the served movies
+		"default_request",
+		f"SELECT m.id, m.title, m.year, m.overview, m.poster_url FROM movie m {_JOIN} {_WHERE}",
+		(
+			f"SELECT m.id, m.title, m.year FROM movie m {_JOIN} {_WHERE}",
+			"SELECT movie_id, overview, poster_url FROM moviedetail WHERE movie_id IN "
+			f"(SELECT m.id FROM movie m {_JOIN} {_WHERE} ORDER BY random() LIMIT {SERVED})",
+		),
+	),
+]
+
+WORDS = (
+	"a young hero must face an ancient evil that threatens the city while a detective uncovers "
+	"secrets about family love betrayal and the war between rival kingdoms across the galaxy"
+).split()
+
+
+def synthetic_rows(count: int, seed: int) -> Iterator[Tuple[int, str, int, str, str, float, List[int]]]:
+	rng = random.Random(seed)
+	# Reuse a pool of overviews: generating text per row would dominate the run
+	overviews = [" ".join(rng.choices(WORDS, k=rng.randint(40, 80))) for _ in range(1000)]
+	weights = [1.0 / rank for rank in range(1, len(GENRES) + 1)]
+	for i in range(1, count + 1):
+		genres = {rng.choices(range(1, len(GENRES) + 1), weights)[0] for _ in range(rng.randint(1, 3))}
+		yield (
+			i,
+			f"Synthetic Movie {i}",
+			rng.randint(1920, 2025),
+			overviews[i % len(overviews)],
+			f"https://posters.example/{i}.jpg",
+			rng.random(),
+			sorted(genres),
+		)
+
+
+def build(path: Path, split: bool, count: int, seed: int, batch: int = 50000) -> None:
+	if split:
+		engine = create_engine(f"sqlite:///{path.as_posix()}")
+		SQLModel.metadata.create_all(engine)
+		engine.dispose()
+	conn = sqlite3.connect(path)
+	if not split:
+		conn.executescript(WIDE_SCHEMA)
+	conn.executemany("INSERT INTO genre (id, name) VALUES (?, ?)", list(enumerate(GENRES, 1)))
+
+	movies, details, links = [], [], []
+
+	def flush() -> None:
+		if split:
+			conn.executemany("INSERT INTO movie (id, title, year, popularity) VALUES (?, ?, ?, ?)", movies)
+			conn.executemany("INSERT INTO moviedetail (movie_id, overview, poster_url) VALUES (?, ?, ?)", details)
+		else:
+			conn.executemany("INSERT INTO movie (id, title, year, overview, poster_url) VALUES (?, ?, ?, ?, ?)", movies)
+		conn.executemany("INSERT INTO moviegenre (movie_id, genre_id) VALUES (?, ?)", links)
+		movies.clear()
+		details.clear()
+		links.clear()
+
+	for movie_id, title, year, overview, poster_url, popularity, genres in synthetic_rows(count, seed):
+		if split:
+			movies.append((movie_id, title, year, popularity))
+			details.append((movie_id, overview, poster_url))
+		else:
+			movies.append((movie_id, title, year, overview, poster_url))
+		links.extend((movie_id, g) for g in genres)
+		if len(movies) >= batch:
+			flush()
+	flush()
+	conn.commit()
+	conn.execute("ANALYZE")
+	conn.close()
+
+
+def read_syscalls() -> Optional[int]:
+	# Linux: read() calls made by this process; with mmap off, one per SQLite page miss
+	try:
+		with open("/proc/self/io", encoding="ascii") as fh:
+			for line in fh:
+				if line.startswith("syscr:"):
+					return int(line.split()[1])
+	except OSError:
+		return None
+	return None
+
+
+def table_pages(path: Path) -> dict:
+	conn = sqlite3.connect(path)
+	try:
+		rows = conn.execute("SELECT name, count(*) FROM dbstat WHERE name IN ('movie', 'moviedetail') GROUP BY name").fetchall()
+	except sqlite3.OperationalError:  # SQLite built without dbstat
+		rows = []
+	page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+	conn.close()
+	return {"page_size": page_size, **{f"{name}_pages": pages for name, pages in rows}}
+
+
+def run_query(path: Path, sql: Union[str, Tuple[str, ...]], params: tuple) -> dict:
+	# Fresh connection per run: SQLite's own page cache starts empty, and it is large
+	# enough that each distinct page touched is read exactly once
+	statements = (sql,) if isinstance(sql, str) else sql
+	conn = sqlite3.connect(path)
+	conn.execute("PRAGMA mmap_size=0")
+	conn.execute("PRAGMA cache_size=-1048576")
+	before = read_syscalls()
+	start = time.perf_counter()
+	# Rows of the first statement: the pool
+	rows = conn.execute(statements[0], params).fetchall()
+	for statement in statements[1:]:
+		conn.execute(statement, params).fetchall()
+	elapsed = time.perf_counter() - start
+	after = read_syscalls()
+	conn.close()
+	return {
+		"rows": len(rows),
+		"ms": round(elapsed * 1000, 2),
+		"page_reads": None if before is None or after is None else after - before,
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Page reads of genre/year queries: wide vs hot/cold movie tables")
+	parser.add_argument("--movies", type=int, default=10_000_000)
+	parser.add_argument("--genre", default=GENRES[5])
+	parser.add_argument("--year-min", type=int, default=1990)
+	parser.add_argument("--year-max", type=int, default=1999)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--workdir", type=Path, default=None, help="Keep the generated DBs here (default: temp dir)")
+	parser.add_argument("--output", type=Path, default=Path("bench_hot_cold_results.json"))
+	args = parser.parse_args()
+
+	workdir = args.workdir or Path(tempfile.mkdtemp(prefix="movies-hotcold-"))
+	workdir.mkdir(parents=True, exist_ok=True)
+	paths = {"wide": workdir / "wide.db", "split": workdir / "split.db"}
+	for layout, path in paths.items():
+		if not path.exists():
+			start = time.perf_counter()
+			build(path, layout == "split", args.movies, args.seed)
+			print(f"Built {layout} catalog ({args.movies} movies) in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+	results = []
+	for name, wide_sql, split_sql in QUERIES:
+		params = (args.year_min, args.year_max) if name == "year_range_scan" else (args.genre, args.year_min, args.year_max)
+		entry = {"query": name}
+		for layout, sql in (("wide", wide_sql), ("split", split_sql)):
+			# One warm-up so the OS file cache is equally hot for both layouts
+			run_query(paths[layout], sql, params)
+			entry[layout] = run_query(paths[layout], sql, params)
+		results.append(entry)
+
+	report = {
+		"git_revision": git_revision(),
+		"movies": args.movies,
+		"filters": {"genre": args.genre, "year_min": args.year_min, "year_max": args.year_max},
+		"tables": {layout: table_pages(path) for layout, path in paths.items()},
+		"results": results,
+	}
+	args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+	print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,114 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the repository root to the path so we can import from backend
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from backend.bench.run_bench import git_revision, synthetic_catalog
+
+# Added to every synthetic movie so one genre's pool is the whole catalog
+POOL_GENRE = "Everything"
+
+
+def orm_pool(session, genre_name: str) -> list:
+	"""The previous read path, kept here as the reference: ORM instances, then a dict per movie."""
+	from sqlalchemy.orm import selectinload
+	from sqlmodel import select
+
+	from backend.app.models import Genre, Movie, MovieGenre
+	from backend.app.repositories import GenreRepository
+
+	statement = (
+		select(Movie)
+		.join(MovieGenre, Movie.id == MovieGenre.movie_id)
+		.join(Genre, Genre.id == MovieGenre.genre_id)
+		.where(Genre.name == genre_name)
+		.options(selectinload(Movie.detail))
+	)
+	movies = session.exec(statement).all()
+	names = GenreRepository.names_by_movie(session, [m.id for m in movies])
+	return [
+		{
+			"id": m.id,
+			"title": m.title,
+			"year": m.year,
+			"genres": names[m.id],
+			"overview": m.detail.overview if m.detail else None,
+			"poster_url": m.detail.poster_url if m.detail else None,
+		}
+		for m in movies
+	]
+
+
+def measure(label: str, load) -> dict:
+	gc.collect()
+	tracemalloc.start()
+	start = time.perf_counter()
+	pool = load()
+	elapsed = time.perf_counter() - start
+	gc.collect()
+	retained, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	result = {
+		"path": label,
+		"movies": len(pool),
+		"load_ms": round(elapsed * 1000, 2),
+		"peak_kib": round(peak / 1024, 1),
+		"retained_kib": round(retained / 1024, 1),
+		"retained_bytes_per_movie": round(retained / max(1, len(pool)), 1),
+	}
+	del pool
+	return result
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Memory and time of the ORM vs MovieRecord read paths")
+	parser.add_argument("--movies", type=int, default=10000)
+	parser.add_argument("--output", type=Path, default=Path("bench_read_model_results.json"))
+	args = parser.parse_args()
+
+	# Point the app at a throwaway DB before any backend module creates its engine
+	db_path = Path(tempfile.mkdtemp(prefix="movies-bench-")) / "bench.db"
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path.as_posix()}"
+
+	from sqlmodel import Session
+
+	from backend.app.db import engine
+	from backend.app.repositories import MovieRepository
+	from backend.seed.seed_db import seed_payload
+
+	payload = synthetic_catalog(args.movies)
+	for entry in payload:
+		entry["genres"].append(POOL_GENRE)
+	seed_payload(payload)
+
+	def orm_path():
+		with Session(engine) as session:
+			return orm_pool(session, POOL_GENRE)
+
+	def record_path():
+		with Session(engine) as session:
+			return MovieRepository.list_records_by_genre(session, POOL_GENRE)
+
+	# Warm up the SQLite page cache and SQLAlchemy statement caches
+	orm_path()
+	record_path()
+	results = [measure("orm", orm_path), measure("records", record_path)]
+	scale = 10000 / args.movies
+	for r in results:
+		r["retained_kib_per_10k"] = round(r["retained_kib"] * scale, 1)
+
+	report = {"git_revision": git_revision(), "movies": args.movies, "results": results}
+	args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+	print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the repository root to the path so we can import from backend
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from backend.app.records import MovieRecord
+from backend.app.schemas import MovieOut, RecommendationsResponse
+from backend.bench.run_bench import git_revision, synthetic_catalog
+
+GENRE = "Drama"
+
+
+def pydantic_path(movies: list, field, loop: asyncio.AbstractEventLoop) -> bytes:
+	"""The previous endpoint: MovieOut per movie, then FastAPI's response_model pass and JSONResponse."""
+	response = RecommendationsResponse(
+		genre=GENRE, requested=len(movies), returned=len(movies), movies=[MovieOut(**m) for m in movies]
+	)
+	# What FastAPI runs for a sync route with response_model when the endpoint returns a model
+	content = loop.run_until_complete(serialize_response(field=field, response_content=response, is_coroutine=False))
+	return JSONResponse(content).body
+
+
+def orjson_path(records: list) -> bytes:
+	"""The current endpoint: MovieRecord.to_dict payload rendered once by ORJSONResponse."""
+	movies = [m.to_dict() for m in records]
+	return ORJSONResponse(
+		{"genre": GENRE, "requested": len(movies), "returned": len(movies), "movies": movies, "degraded": False}
+	).body
+
+
+def measure(label: str, render, iterations: int) -> dict:
+	render()
+	start = time.perf_counter()
+	for _ in range(iterations):
+		body = render()
+	elapsed = time.perf_counter() - start
+	return {"path": label, "us_per_response": round(elapsed / iterations * 1e6, 1), "bytes": len(body)}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Cost of building and encoding one recommendation response")
+	parser.add_argument("--n", type=int, default=20, help="Movies per response")
+	parser.add_argument("--iterations", type=int, default=5000)
+	parser.add_argument("--output", type=Path, default=Path("bench_serialization_results.json"))
+	args = parser.parse_args()
+
+	records = [
+		MovieRecord(i, entry["title"], entry["year"], entry["overview"], entry["poster_url"], tuple(entry["genres"]))
+		for i, entry in enumerate(synthetic_catalog(args.n), 1)
+	]
+	movies = [m.to_dict() for m in records]
+	field = create_response_field(name="Response_recommend", type_=RecommendationsResponse, mode="serialization")
+	loop = asyncio.new_event_loop()
+
+	results = [
+		measure("pydantic_response_model", lambda: pydantic_path(movies, field, loop), args.iterations),
+		measure("orjson_records", lambda: orjson_path(records), args.iterations),
+	]
+	loop.close()
+	report = {
+		"git_revision": git_revision(),
+		"movies_per_response": args.n,
+		"iterations": args.iterations,
+		"results": results,
+	}
+	args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+	print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add the repository root to the path so we can import from backend
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(_REPO_ROOT))
+
+GENRES = [
+	"Action", "Adventure", "Animation", "Comedy", "Crime", "Drama", "Family",
+	"Fantasy", "Horror", "Music", "Mystery", "Romance", "Sci-Fi", "Thriller",
+]
+
+
+def synthetic_catalog(size: int, skew: float = 1.0, genres_per_movie: int = 3, seed: int = 0) -> List[Dict]:
+	"""Seed-file shaped payload whose genre popularity follows a Zipf-like law.
+
+	`skew=0` spreads movies evenly across genres; larger values concentrate
+	them in the first few genres of GENRES.
+	"""
+	rng = random.Random(seed)
+	weights = [1.0 / (rank ** skew) for rank in range(1, len(GENRES) + 1)]
+	payload = []
+	for i in range(size):
+		picked = set()
+		while len(picked) < min(genres_per_movie, len(GENRES)):
+			picked.add(rng.choices(GENRES, weights)[0])
+		payload.append(
+			{
+				"title": f"Synthetic Movie {i}",
+				"year": rng.randint(1950, 2025),
+				"overview": f"Synthetic overview for movie {i}. " * 4,
+				"poster_url": None,
+				"genres": sorted(picked),
+			}
+		)
+	return payload
+
+
+def generated_mix(count: int, skew: float = 1.0, seed: int = 0) -> List[Dict]:
+	rng = random.Random(seed)
+	weights = [1.0 / (rank ** skew) for rank in range(1, len(GENRES) + 1)]
+	mix = []
+	for _ in range(count):
+		params = {"genre": rng.choices(GENRES, weights)[0], "n": rng.choice([5, 10, 20])}
+		if rng.random() < 0.3:
+			params["year_min"] = rng.randint(1950, 2000)
+			params["year_max"] = params["year_min"] + rng.randint(5, 25)
+		mix.append({"method": "GET", "path": "/recommendations", "params": params})
+	return mix
+
+
+def load_mix(path: Path) -> List[Dict]:
+	"""Read a JSONL request mix; lines without a `path` key are ignored.
+
+	This lets the file double as a backlog/notes file, as the repository's
+	own `requests.jsonl` does.
+	"""
+	mix = []
+	with open(path, "r", encoding="utf-8") as f:
+		for line in f:
+			line = line.strip()
+			if not line:
+				continue
+			entry = json.loads(line)
+			if isinstance(entry, dict) and "path" in entry:
+				entry.setdefault("method", "GET")
+				entry.setdefault("params", {})
+				mix.append(entry)
+	return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+	if not sorted_values:
+		return 0.0
+	idx = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * (len(sorted_values) - 1)))))
+	return sorted_values[idx]
+
+
+def summarize(latencies: List[float], statuses: Dict[int, int], elapsed: float) -> Dict:
+	ordered = sorted(latencies)
+	return {
+		"requests": len(latencies),
+		"elapsed_s": round(elapsed, 4),
+		"throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+		"mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+		"p50_ms": round(percentile(ordered, 50) * 1000, 3),
+		"p95_ms": round(percentile(ordered, 95) * 1000, 3),
+		"p99_ms": round(percentile(ordered, 99) * 1000, 3),
+		"statuses": {str(k): v for k, v in sorted(statuses.items())},
+	}
+
+
+async def replay(client, mix: List[Dict], concurrency: int) -> Dict:
+	latencies: List[float] = []
+	statuses: Dict[int, int] = {}
+	queue: asyncio.Queue = asyncio.Queue()
+	for entry in mix:
+		queue.put_nowait(entry)
+
+	async def worker() -> None:
+		while True:
+			try:
+				entry = queue.get_nowait()
+			except asyncio.QueueEmpty:
+				return
+			start = time.perf_counter()
+			response = await client.request(entry["method"], entry["path"], params=entry["params"])
+			await response.aread()
+			latencies.append(time.perf_counter() - start)
+			statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+	start = time.perf_counter()
+	await asyncio.gather(*(worker() for _ in range(concurrency)))
+	return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+async def run_in_process(app, mix: List[Dict], concurrency: int, warmup: int) -> Dict:
+	import httpx
+
+	transport = httpx.ASGITransport(app=app)
+	async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+		await replay(client, mix[:warmup], concurrency)
+		return await replay(client, mix, concurrency)
+
+
+def _free_port() -> int:
+	with socket.socket() as s:
+		s.bind(("127.0.0.1", 0))
+		return s.getsockname()[1]
+
+
+async def run_over_socket(app, mix: List[Dict], concurrency: int, warmup: int) -> Dict:
+	import httpx
+	import uvicorn
+
+	port = _free_port()
+	server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+	thread = threading.Thread(target=server.run, daemon=True)
+	thread.start()
+	while not server.started:
+		await asyncio.sleep(0.05)
+	try:
+		limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+		async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+			await replay(client, mix[:warmup], concurrency)
+			return await replay(client, mix, concurrency)
+	finally:
+		server.should_exit = True
+		thread.join()
+
+
+def git_revision() -> Optional[str]:
+	try:
+		return subprocess.check_output(
+			["git", "rev-parse", "HEAD"], cwd=_REPO_ROOT, stderr=subprocess.DEVNULL, text=True
+		).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Benchmark the recommendations API")
+	parser.add_argument("--catalog-size", type=int, default=5000)
+	parser.add_argument("--genre-skew", type=float, default=1.0)
+	parser.add_argument("--requests", type=int, default=2000, help="Size of a generated request mix")
+	parser.add_argument("--mix", type=Path, default=None, help="JSONL request mix to replay instead")
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--warmup", type=int, default=100)
+	parser.add_argument("--mode", choices=["asgi", "socket", "both"], default="both")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+	args = parser.parse_args()
+
+	# Point the app at a throwaway DB before any backend module creates its engine
+	workdir = tempfile.mkdtemp(prefix="movies-bench-")
+	db_path = Path(workdir) / "bench.db"
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path.as_posix()}"
+
+	from backend.seed.seed_db import seed_payload
+	from backend.app.main import app
+
+	start = time.perf_counter()
+	seed_payload(synthetic_catalog(args.catalog_size, args.genre_skew, seed=args.seed))
+	seed_s = time.perf_counter() - start
+
+	mix = load_mix(args.mix) if args.mix else generated_mix(args.requests, args.genre_skew, args.seed)
+	if not mix:
+		parser.error(f"No replayable requests (lines with a 'path' key) in {args.mix}")
+
+	results = {}
+	if args.mode in ("asgi", "both"):
+		results["asgi"] = asyncio.run(run_in_process(app, mix, args.concurrency, args.warmup))
+	if args.mode in ("socket", "both"):
+		results["socket"] = asyncio.run(run_over_socket(app, mix, args.concurrency, args.warmup))
+
+	report = {
+		"git_revision": git_revision(),
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"python": sys.version.split()[0],
+		"config": {
+			"catalog_size": args.catalog_size,
+			"genre_skew": args.genre_skew,
+			"requests": len(mix),
+			"mix": str(args.mix) if args.mix else "generated",
+			"concurrency": args.concurrency,
+			"warmup": args.warmup,
+			"seed": args.seed,
+		},
+		"seed_s": round(seed_s, 3),
+		"results": results,
+	}
+	args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+	print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+	main()
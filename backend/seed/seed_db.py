@@ -1,15 +1,22 @@
 import json
 import sys
+import time
 from pathlib import Path
 from typing import Dict, List
 
 # Add the parent directory to the path so we can import from backend
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from sqlmodel import Session, select, delete
+from sqlalchemy import func, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine, select, delete
 
-from backend.app.db import engine
-from backend.app.models import Movie, Genre, MovieGenre
+from backend.app.cache import cache
+from backend.app.catalog import bump_catalog_version, get_catalog_version
+from backend.app.config import settings
+from backend.app.db import SNAPSHOT_POINTER, catalog_session, engine, publish_snapshot, shards, snapshot_url
+from backend.app.migrations import migrate
+from backend.app.models import CatalogVersion, Movie, MovieDetail, Genre, MovieGenre
 from sqlmodel import SQLModel
 
 SEED_FILE = Path(__file__).with_name("seed_movies.json")
@@ -21,25 +28,29 @@ def get_or_create_genre(session: Session, name: str) -> Genre:
 		return genre
 	genre = Genre(name=name)
 	session.add(genre)
-	session.commit()
-	session.refresh(genre)
+	session.flush()
 	return genre
 
 
-def seed_movies() -> None:
-	with open(SEED_FILE, "r", encoding="utf-8") as f:
-		payload: List[Dict] = json.load(f)
+def load_seed_file(path: Path = SEED_FILE) -> List[Dict]:
+	with open(path, "r", encoding="utf-8") as f:
+		return json.load(f)
 
-	# Ensure tables exist in a fresh DB
-	SQLModel.metadata.create_all(engine)
 
-	with Session(engine) as session:
+def seed_payload(payload: List[Dict], target_engine: Engine = engine) -> None:
+	# Ensure tables exist in a fresh DB and older ones have the current schema
+	SQLModel.metadata.create_all(target_engine)
+	migrate(target_engine)
+
+	with Session(target_engine) as session:
 		# Clear existing data to avoid duplicates
 		session.exec(delete(MovieGenre))
+		session.exec(delete(MovieDetail))
 		session.exec(delete(Movie))
 		session.exec(delete(Genre))
 		session.commit()
 
+		genres: Dict[str, Genre] = {}
 		for entry in payload:
 			title = entry["title"]
 			year = entry.get("year")
@@ -47,17 +58,133 @@ def seed_movies() -> None:
 			poster_url = entry.get("poster_url")
 			genre_names = entry.get("genres", [])
 
-			movie = Movie(title=title, year=year, overview=overview, poster_url=poster_url)
+			movie = Movie(title=title, year=year, popularity=entry.get("popularity", 0.0))
 			session.add(movie)
-			session.commit()
-			session.refresh(movie)
+			session.flush()
+			session.add(MovieDetail(movie_id=movie.id, overview=overview, poster_url=poster_url))
 
 			for gname in genre_names:
-				genre = get_or_create_genre(session, gname)
+				genre = genres.get(gname)
+				if genre is None:
+					genre = genres[gname] = get_or_create_genre(session, gname)
 				link = MovieGenre(movie_id=movie.id, genre_id=genre.id)
 				session.add(link)
+		# Commits the catalog together with the version bump workers poll for
+		bump_catalog_version(session)
+
+
+def seed_shards(payload: List[Dict]) -> None:
+	"""Write each movie to the shard its id hashes to, with every genre on every shard.
+
+	Ids are assigned here rather than by each shard's autoincrement so they
+	stay unique across shards; genre ids are fixed the same way so genre
+	joins agree everywhere. The primary keeps the genre table (genre lists,
+	indexes) and the catalog version, but no movies.
+	"""
+	genre_names = list(dict.fromkeys(name for entry in payload for name in entry.get("genres", [])))
+	genre_ids = {name: i for i, name in enumerate(genre_names, 1)}
+	sessions = []
+	for target_engine in [engine] + shards.engines:
+		SQLModel.metadata.create_all(target_engine)
+		migrate(target_engine)
+		session = Session(target_engine)
+		session.exec(delete(MovieGenre))
+		session.exec(delete(MovieDetail))
+		session.exec(delete(Movie))
+		session.exec(delete(Genre))
+		session.add_all(Genre(id=genre_id, name=name) for name, genre_id in genre_ids.items())
+		sessions.append(session)
+	primary, shard_sessions = sessions[0], sessions[1:]
+	try:
+		for movie_id, entry in enumerate(payload, 1):
+			session = shard_sessions[shards.shard_of(movie_id)]
+			session.add(Movie(id=movie_id, title=entry["title"], year=entry.get("year"), popularity=entry.get("popularity", 0.0)))
+			session.add(MovieDetail(movie_id=movie_id, overview=entry.get("overview"), poster_url=entry.get("poster_url")))
+			for gname in entry.get("genres", []):
+				session.add(MovieGenre(movie_id=movie_id, genre_id=genre_ids[gname]))
+		for session in shard_sessions:
+			session.commit()
+		# Workers rebuild indexes once every shard holds the new catalog
+		bump_catalog_version(primary)
+	finally:
+		for session in sessions:
+			session.close()
+
+
+def validate_catalog(target_engine: Engine, payload: List[Dict]) -> None:
+	"""Raise ValueError unless the seeded DB is intact and holds exactly `payload`."""
+	with Session(target_engine) as session:
+		status = session.execute(text("PRAGMA integrity_check")).scalar()
+		if status != "ok":
+			raise ValueError(f"Integrity check failed: {status}")
+		movies = session.exec(select(func.count()).select_from(Movie)).one()
+		if movies == 0:
+			raise ValueError("Catalog is empty")
+		if movies != len(payload):
+			raise ValueError(f"Expected {len(payload)} movies, found {movies}")
+		expected = {name for entry in payload for name in entry.get("genres", [])}
+		found = set(session.exec(select(Genre.name)).all())
+		if found != expected:
+			raise ValueError(f"Genre mismatch: missing {sorted(expected - found)}, unexpected {sorted(found - expected)}")
+
+
+def prune_snapshots(directory: Path, keep: List[str]) -> None:
+	# Readers that opened the previous file before the switch may still be using it
+	for path in directory.glob("catalog-v*.db"):
+		if path.name not in keep:
+			path.unlink(missing_ok=True)
+
+
+def seed_snapshot(payload: List[Dict], directory: Path) -> str:
+	"""Build, validate and publish a new catalog file; the live one is never written."""
+	directory.mkdir(parents=True, exist_ok=True)
+	# Before the first snapshot, the version is read from the primary, which may be a fresh file
+	SQLModel.metadata.create_all(engine)
+	migrate(engine)
+	with catalog_session() as session:
+		version = get_catalog_version(session)
+	name = f"catalog-v{version + 1}.db"
+	path = directory / name
+	path.unlink(missing_ok=True)
+
+	snapshot_engine = create_engine(snapshot_url(path))
+	try:
+		SQLModel.metadata.create_all(snapshot_engine)
+		with Session(snapshot_engine) as session:
+			# seed_payload bumps this, so versions keep increasing across snapshots
+			session.add(CatalogVersion(id=1, version=version, updated_at=time.time()))
 			session.commit()
+		seed_payload(payload, snapshot_engine)
+		validate_catalog(snapshot_engine, payload)
+	except Exception:
+		snapshot_engine.dispose()
+		# Never leave a rejected catalog where it could be published later
+		path.unlink(missing_ok=True)
+		raise
+	snapshot_engine.dispose()
+
+	pointer = directory / SNAPSHOT_POINTER
+	previous = pointer.read_text(encoding="utf-8").strip() if pointer.exists() else None
+	publish_snapshot(directory, name)
+	prune_snapshots(directory, [name, previous])
+	return name
 
+
+def seed_movies() -> None:
+	payload = load_seed_file()
+	if shards.enabled:
+		seed_shards(payload)
+		cache.bump_version()
+		print(f"Seeded {len(payload)} movies across {len(shards)} shards from {SEED_FILE}")
+		return
+	if settings.CATALOG_SNAPSHOT_DIR:
+		name = seed_snapshot(payload, Path(settings.CATALOG_SNAPSHOT_DIR))
+		cache.bump_version()
+		print(f"Published snapshot {name} with {len(payload)} movies from {SEED_FILE}")
+		return
+	seed_payload(payload)
+	# Invalidate every cached genre list and pool that shares this cache backend
+	cache.bump_version()
 	print(f"Seeded {len(payload)} movies from {SEED_FILE}")
 
 
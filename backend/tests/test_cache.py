@@ -0,0 +1,77 @@
+from typing import Dict, Optional
+
+from backend.app.cache import Cache, RedisBackend
+from backend.app.records import MovieRecord, records_from_rows
+
+
+class FakeRedis:
+	"""The slice of the redis-py client RedisBackend uses, kept in a dict."""
+
+	def __init__(self) -> None:
+		self.data: Dict[str, bytes] = {}
+		self.ttls: Dict[str, Optional[int]] = {}
+
+	def get(self, key: str) -> Optional[bytes]:
+		return self.data.get(key)
+
+	def set(self, key: str, value: bytes, px: Optional[int] = None) -> None:
+		self.data[key] = value
+		self.ttls[key] = px
+
+	def incr(self, key: str) -> int:
+		value = int(self.data.get(key, b"0")) + 1
+		self.data[key] = str(value).encode()
+		return value
+
+
+class Counter:
+	def __init__(self, value) -> None:
+		self.value = value
+		self.calls = 0
+
+	def __call__(self):
+		self.calls += 1
+		return self.value
+
+
+def test_hit_after_miss_round_trips_through_json():
+	client = FakeRedis()
+	cache = Cache(RedisBackend(client=client), ttl_s=2.5)
+	compute = Counter([MovieRecord(1, "Alien", 1979, None, None, ("Horror",))])
+
+	first = cache.get_or_set("pool", "Horror", compute, decode=records_from_rows)
+	second = cache.get_or_set("pool", "Horror", compute, decode=records_from_rows)
+
+	assert compute.calls == 1
+	assert second == first
+	assert isinstance(second[0], MovieRecord)
+	assert list(client.ttls.values()) == [2500]
+
+
+def test_version_bump_invalidates_every_worker():
+	client = FakeRedis()
+	# Two workers sharing one redis
+	worker_a = Cache(RedisBackend(client=client))
+	worker_b = Cache(RedisBackend(client=client))
+	compute = Counter(["Drama", "Horror"])
+
+	worker_a.get_or_set("genres", "all", compute)
+	worker_b.get_or_set("genres", "all", compute)
+	assert compute.calls == 1
+
+	worker_a.bump_version()
+	assert worker_b.version() == 1
+	worker_b.get_or_set("genres", "all", compute)
+	worker_a.get_or_set("genres", "all", compute)
+	assert compute.calls == 2
+
+
+def test_catalog_version_change_misses():
+	cache = Cache(RedisBackend(client=FakeRedis()))
+	compute = Counter(["Drama"])
+
+	cache.get_or_set("genres", "all", compute)
+	cache.catalog_version = 7
+	cache.get_or_set("genres", "all", compute)
+
+	assert compute.calls == 2
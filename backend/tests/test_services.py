@@ -0,0 +1,35 @@
+from backend.app.cache import cache
+from backend.app.diversity import mmr_select
+from backend.app.records import MovieRecord
+from backend.app.services import RecommendationService, _remember_pool, sample_unseen
+
+GENRES = [("Action",), ("Action", "Comedy"), ("Action", "Drama"), ("Action", "Sci-Fi")]
+POOL = [MovieRecord(i, f"Movie {i}", 1980 + 5 * i, None, None, GENRES[i % len(GENRES)]) for i in range(1, 9)]
+SEEN = {1, 2, 3, 4, 5}
+
+
+def test_diversify_candidates_skip_seen_movies_when_enough_are_fresh():
+	for _ in range(50):
+		candidates = sample_unseen(POOL, 20, SEEN, fill=3)
+		assert {m.id for m in candidates} == {6, 7, 8}
+		picked = mmr_select(candidates, 3)
+		assert not SEEN & {m.id for m in picked}
+
+
+def test_diversify_candidates_top_up_only_what_fresh_movies_cannot_cover():
+	candidates = sample_unseen(POOL, 20, SEEN, fill=5)
+	assert len(candidates) == 5
+	assert {6, 7, 8} <= {m.id for m in candidates}
+
+
+def test_plain_sampling_tops_up_to_k():
+	assert len(sample_unseen(POOL, 6, SEEN)) == 6
+
+
+def test_fallback_skips_pools_from_an_older_catalog(monkeypatch):
+	monkeypatch.setattr("backend.app.services.fallback_pools", None)
+	monkeypatch.setattr(cache, "catalog_version", 7)
+	_remember_pool(("Action", "*"), POOL)
+	assert RecommendationService.fallback_pool("Action") == POOL
+	monkeypatch.setattr(cache, "catalog_version", 8)
+	assert RecommendationService.fallback_pool("Action") == []
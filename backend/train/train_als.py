@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# Add the parent directory to the path so we can import from backend
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+import scipy.sparse as sp
+from sqlmodel import Session, select
+
+from backend.app.ann import IVFIndex, NO_YEAR, encode_genres
+from backend.app.config import settings
+from backend.app.db import catalog_session, engine, shards
+from backend.app.models import Movie, MovieGenre
+from backend.app.personalization import (
+	ANN_DIR,
+	EVENT_WEIGHTS,
+	ITEM_FACTORS_FILE,
+	ITEM_IDS_FILE,
+	META_FILE,
+	MODEL_POINTER,
+	USER_FACTORS_FILE,
+	USER_ITEMS_FILE,
+)
+from backend.app.repositories import InteractionRepository
+
+
+def load_interactions(session: Session) -> Tuple[List[str], np.ndarray, sp.csr_matrix]:
+	"""Users, sorted movie ids and the weighted user x item matrix."""
+	users: dict = {}
+	rows, movie_ids, weights = [], [], []
+	for user_id, movie_id, event, count in InteractionRepository.event_counts(session):
+		rows.append(users.setdefault(user_id, len(users)))
+		movie_ids.append(movie_id)
+		weights.append(EVENT_WEIGHTS.get(event, 1.0) * count)
+
+	item_ids = np.unique(np.asarray(movie_ids, dtype=np.int64))
+	cols = np.searchsorted(item_ids, np.asarray(movie_ids, dtype=np.int64))
+	# COO -> CSR sums the weights of repeated (user, movie) pairs
+	matrix = sp.coo_matrix(
+		(np.asarray(weights, dtype=np.float32), (np.asarray(rows), cols)),
+		shape=(len(users), len(item_ids)),
+	).tocsr()
+	return list(users), item_ids, matrix
+
+
+def item_metadata(session: Session, item_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+	"""Year and packed genre bits per trained item, for filtered ANN search."""
+	years = np.full(len(item_ids), NO_YEAR, dtype=np.int32)
+	genres: List[List[int]] = [[] for _ in item_ids]
+
+	def rows_for(ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+		ids_arr = np.asarray(ids, dtype=np.int64)
+		pos = np.minimum(np.searchsorted(item_ids, ids_arr), len(item_ids) - 1)
+		return pos, item_ids[pos] == ids_arr
+
+	def all_rows(statement) -> list:
+		return [row for part in shards.scatter(session, lambda _, s: s.exec(statement).all()) for row in part]
+
+	movies = all_rows(select(Movie.id, Movie.year))
+	if movies:
+		pos, found = rows_for([m[0] for m in movies])
+		movie_years = np.asarray([NO_YEAR if m[1] is None else m[1] for m in movies], dtype=np.int32)
+		years[pos[found]] = movie_years[found]
+
+	links = all_rows(select(MovieGenre.movie_id, MovieGenre.genre_id))
+	max_genre_id = 0
+	if links:
+		pos, found = rows_for([link[0] for link in links])
+		for row, ok, (_, genre_id) in zip(pos, found, links):
+			if ok:
+				genres[row].append(genre_id)
+				max_genre_id = max(max_genre_id, genre_id)
+	return years, encode_genres(genres, max_genre_id)
+
+
+def _solve_side(
+	matrix: sp.csr_matrix, fixed: np.ndarray, reg: float, alpha: float
+) -> np.ndarray:
+	# Implicit ALS (Hu, Koren & Volinsky 2008): confidence c = 1 + alpha * r,
+	# solve (YtY + Yt (C - I) Y + reg I) x = Yt C p for every row.
+	factors = fixed.shape[1]
+	gram = fixed.T @ fixed + reg * np.eye(factors, dtype=fixed.dtype)
+	out = np.zeros((matrix.shape[0], factors), dtype=fixed.dtype)
+	for row in range(matrix.shape[0]):
+		start, end = matrix.indptr[row], matrix.indptr[row + 1]
+		if start == end:
+			continue
+		cols = matrix.indices[start:end]
+		conf = alpha * matrix.data[start:end]
+		block = fixed[cols]
+		a = gram + (block.T * conf) @ block
+		b = block.T @ (1.0 + conf)
+		out[row] = np.linalg.solve(a, b)
+	return out
+
+
+def train_als(
+	matrix: sp.csr_matrix,
+	factors: int = 32,
+	reg: float = 0.1,
+	alpha: float = 20.0,
+	iterations: int = 10,
+	seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+	rng = np.random.default_rng(seed)
+	user_factors = (rng.standard_normal((matrix.shape[0], factors)) * 0.01).astype(np.float32)
+	item_factors = (rng.standard_normal((matrix.shape[1], factors)) * 0.01).astype(np.float32)
+	transposed = matrix.T.tocsr()
+	for _ in range(iterations):
+		user_factors = _solve_side(matrix, item_factors, reg, alpha)
+		item_factors = _solve_side(transposed, user_factors, reg, alpha)
+	return user_factors, item_factors
+
+
+def save_model(
+	model_dir: Path,
+	users: List[str],
+	item_ids: np.ndarray,
+	matrix: sp.csr_matrix,
+	user_factors: np.ndarray,
+	item_factors: np.ndarray,
+	params: dict,
+) -> None:
+	np.save(model_dir / USER_FACTORS_FILE, user_factors)
+	np.save(model_dir / ITEM_FACTORS_FILE, item_factors)
+	np.save(model_dir / ITEM_IDS_FILE, item_ids)
+	sp.save_npz(model_dir / USER_ITEMS_FILE, matrix)
+	popularity = np.asarray(matrix.sum(axis=0)).ravel()
+	meta = {
+		"trained_at": time.time(),
+		"params": params,
+		"users": users,
+		"popular": np.argsort(-popularity)[:1000].tolist(),
+	}
+	(model_dir / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+
+def new_model_version(root: Path) -> Path:
+	"""Empty `model-v{N}` directory, numbered after every existing version."""
+	root.mkdir(parents=True, exist_ok=True)
+	versions = [int(p.name[len("model-v"):]) for p in root.glob("model-v*") if p.name[len("model-v"):].isdigit()]
+	path = root / f"model-v{max(versions, default=0) + 1}"
+	path.mkdir()
+	return path
+
+
+def publish_model(root: Path, version_dir: Path) -> None:
+	"""Point workers at `version_dir` with one rename, then drop versions older than the previous one."""
+	pointer = root / MODEL_POINTER
+	previous = pointer.read_text(encoding="utf-8").strip() if pointer.exists() else None
+	tmp = root / (MODEL_POINTER + ".tmp")
+	tmp.write_text(version_dir.name, encoding="utf-8")
+	os.replace(tmp, pointer)
+	# Workers still on the previous version keep it until they reload; unlinked mapped files stay readable
+	for path in root.glob("model-v*"):
+		if path.name not in (version_dir.name, previous):
+			shutil.rmtree(path, ignore_errors=True)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Train implicit ALS factors from recorded interactions")
+	parser.add_argument("--factors", type=int, default=32)
+	parser.add_argument("--reg", type=float, default=0.1)
+	parser.add_argument("--alpha", type=float, default=20.0)
+	parser.add_argument("--iterations", type=int, default=10)
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--model-dir", type=Path, default=Path(settings.MODEL_DIR))
+	parser.add_argument(
+		"--ann-lists", type=int, default=0, help="Also build an IVF index with this many lists (0 = skip)"
+	)
+	args = parser.parse_args()
+
+	with Session(engine) as session:
+		users, item_ids, matrix = load_interactions(session)
+	if matrix.nnz == 0:
+		print("No interactions recorded; nothing to train")
+		return
+
+	start = time.perf_counter()
+	params = {"factors": args.factors, "reg": args.reg, "alpha": args.alpha, "iterations": args.iterations}
+	user_factors, item_factors = train_als(matrix, seed=args.seed, **params)
+	# Every file goes into a fresh directory: workers have the published version's files memory-mapped
+	version_dir = new_model_version(args.model_dir)
+	if args.ann_lists > 0:
+		with catalog_session() as session:
+			years, genre_bits = item_metadata(session, item_ids)
+		index = IVFIndex.build(item_factors, years, genre_bits, args.ann_lists, seed=args.seed)
+		index.save(version_dir / ANN_DIR)
+	save_model(version_dir, users, item_ids, matrix, user_factors, item_factors, params)
+	# Published only once the whole version, index included, is on disk
+	publish_model(args.model_dir, version_dir)
+	print(
+		f"Trained {args.factors} factors for {len(users)} users x {len(item_ids)} movies "
+		f"({matrix.nnz} interactions) in {time.perf_counter() - start:.2f}s -> {version_dir}"
+	)
+
+
+if __name__ == "__main__":
+	main()